@@ -0,0 +1,304 @@
+"""Консольные команды для работы с расписанием без окна приложения.
+
+    python schedule_app.py export --folder D:/Отчеты
+    python schedule_app.py report --from 2024-01 --to 2024-12 --output итоги.csv
+    python schedule_app.py validate
+    python schedule_app.py generate --period 2024-05 --min Рег=3 --min КЦ=5 --pattern 2/2
+
+Команды не импортируют PyQt5 и подходят для cron и серверов без дисплея.
+"""
+import argparse
+import csv
+import multiprocessing
+import os
+import sys
+
+from schedule_core import (create_schedule_manager, schedule_hash, ScheduleManager, ScheduleExporter,
+                           ScheduleAnalytics, RosterGenerator, PeriodChangedError)
+
+
+def detect_storage_format():
+    """Формат хранения данных в текущей папке: sqlite, packed или json"""
+    if os.path.exists("schedule.db"):
+        return "sqlite"
+    extension = ScheduleManager.FORMAT_EXTENSIONS["packed"]
+    if os.path.isdir("schedules") and any(name.endswith(extension) for name in os.listdir("schedules")):
+        # Иначе менеджер JSON перезаписал бы упакованные периоды в JSON при сохранении
+        return "packed"
+    return "json"
+
+
+def open_manager(args, read_only=False):
+    """Переходит в папку данных и открывает менеджер нужного формата"""
+    os.chdir(args.data)
+    storage_format = args.storage
+    if storage_format == "auto":
+        storage_format = detect_storage_format()
+    return create_schedule_manager(storage_format, read_only=read_only)
+
+
+def select_periods(periods, first=None, last=None):
+    return [period for period in periods
+            if (first is None or period >= first) and (last is None or period <= last)]
+
+
+def command_export(args):
+    # Папка экспорта задается относительно каталога запуска, а не папки данных
+    folder = os.path.abspath(args.folder)
+    db = open_manager(args)
+    os.makedirs(folder, exist_ok=True)
+    file_path = os.path.join(folder, ScheduleExporter.FILE_NAME)
+    # Консольная команда однопоточна, поэтому процессы можно запускать через fork
+    start_method = "fork" if "fork" in multiprocessing.get_all_start_methods() else "spawn"
+    exporter = ScheduleExporter(db, workers=args.workers, start_method=start_method)
+    if exporter.export(file_path, force=args.force):
+        print(f"Файл сохранен: {file_path}")
+    else:
+        print(f"Данные не изменились, файл не перезаписан: {file_path}")
+    return 0
+
+
+def command_report(args):
+    """Итоги по сотрудникам или должностям (смены, столбцы подсчета, часы, дни по статусам)"""
+    output = os.path.abspath(args.output) if args.output else None
+    db = open_manager(args)
+    analytics = ScheduleAnalytics(db)
+    statuses = db.statuses
+    keys = statuses.total_keys
+    day_codes = statuses.absence_codes
+    titles = statuses.total_titles + [statuses.labels[code] for code in day_codes]
+    # Порядок сотрудников как в общем списке
+    order = {emp["id"]: index for index, emp in enumerate(db.employees)}
+
+    def values(totals):
+        days = totals.get("status_days", {})
+        return ([totals[key] for key in keys[:-1]] + [round(totals["hours"], 2)]
+                + [days.get(str(code), 0) for code in day_codes])
+
+    def ordered(totals_by_employee):
+        return sorted(totals_by_employee, key=lambda emp_id: order.get(emp_id, len(order)))
+
+    rows = []
+    if args.rolling is not None:
+        for period, totals_by_employee in analytics.rolling_totals(args.first, args.last, args.rolling).items():
+            for emp_id in ordered(totals_by_employee):
+                rows.append([period, db.employee_name(emp_id)] + values(totals_by_employee[emp_id]))
+        header = ["Период", "Сотрудник"] + titles
+    elif args.by_period:
+        summaries = db.get_period_summaries()
+        for period in analytics.periods(args.first, args.last):
+            for emp_id, totals in summaries[period]["totals"].items():
+                rows.append([period, db.employee_name(emp_id)] + values(totals))
+        header = ["Период", "Сотрудник"] + titles
+    elif args.by_team:
+        for team, totals in sorted(analytics.team_totals(args.first, args.last).items()):
+            rows.append([team, totals["employees"]] + values(totals))
+        header = ["Должность", "Сотрудников"] + titles
+    else:
+        combined = analytics.employee_totals(args.first, args.last)
+        for emp_id in ordered(combined):
+            rows.append([db.employee_name(emp_id)] + values(combined[emp_id]))
+        header = ["Сотрудник"] + titles
+
+    if output:
+        # utf-8-sig, чтобы Excel открывал файл с кириллицей без настройки кодировки
+        with open(output, 'w', encoding='utf-8-sig', newline='') as f:
+            writer = csv.writer(f, delimiter=';')
+            writer.writerow(header)
+            writer.writerows(rows)
+        print(f"Отчет сохранен: {output} (периодов: {len(analytics.periods(args.first, args.last))})")
+    else:
+        writer = csv.writer(sys.stdout, delimiter='\t', lineterminator='\n')
+        writer.writerow(header)
+        writer.writerows(rows)
+    return 0
+
+
+def validate_period(db, period, data, summary):
+    """Список проблем в данных периода"""
+    problems = []
+    try:
+        year, month = map(int, period.split('-'))
+        days_in_month = db.calendar.days_in_month(year, month)
+    except ValueError:
+        problems.append("имя периода не в формате ГГГГ-ММ")
+        days_in_month = None
+
+    employees = data.get('employees', [])
+    schedule = data.get('schedule', {})
+    if len(set(employees)) != len(employees):
+        problems.append("сотрудник указан в периоде несколько раз")
+    for emp_id in employees:
+        if db.get_employee(emp_id) is None:
+            problems.append(f"{emp_id}: нет в списке сотрудников")
+        if emp_id not in schedule:
+            problems.append(f"{db.employee_name(emp_id)}: нет строки расписания")
+    for emp_id, days in schedule.items():
+        name = db.employee_name(emp_id)
+        if emp_id not in employees:
+            problems.append(f"{name}: строка расписания без сотрудника в периоде")
+        if days_in_month is not None and len(days) != days_in_month:
+            problems.append(f"{name}: {len(days)} дней вместо {days_in_month}")
+        invalid = sorted({status for status in days if status not in db.statuses.codes}, key=str)
+        if invalid:
+            problems.append(f"{name}: неизвестные статусы {invalid}")
+
+    for emp_id, emp_notes in data.get('notes', {}).items():
+        name = db.employee_name(emp_id)
+        if emp_id not in schedule:
+            problems.append(f"{name}: заметки без строки расписания")
+            continue
+        for day_key, note in emp_notes.items():
+            if not day_key.isdigit() or int(day_key) >= len(schedule[emp_id]):
+                problems.append(f"{name}: заметка для несуществующего дня {day_key}")
+            elif not isinstance(note.get('worked_hours', 0), (int, float)):
+                problems.append(f"{name}: в заметке дня {int(day_key) + 1} часы не числом")
+
+    if summary is not None and summary["hash"] != schedule_hash(data):
+        problems.append("сводка в манифесте устарела")
+    return problems
+
+
+def command_validate(args):
+    # Проверка ничего не записывает: старые форматы переводятся на id только в памяти
+    db = open_manager(args, read_only=True)
+    summaries = db.get_period_summaries()
+    periods = select_periods(db.get_periods(), args.first, args.last)
+    failed = 0
+    for period in periods:
+        try:
+            data = db.load_schedule(period)
+        except Exception as e:
+            problems = [f"не удалось прочитать: {e}"]
+        else:
+            if data is None:
+                problems = ["файл периода не найден"]
+            else:
+                problems = validate_period(db, period, data, summaries.get(period))
+        if problems:
+            failed += 1
+            for problem in problems:
+                print(f"{period}: {problem}")
+    print(f"Проверено периодов: {len(periods)}, с ошибками: {failed}")
+    return 1 if failed else 0
+
+
+def parse_status(statuses, name):
+    """Код статуса по подписи, коду или названию столбца подсчета (Рег, КЦ)"""
+    cell = statuses.parse_cell_text(name)
+    if cell is not None and name.strip():
+        return cell[0]
+    for counter in statuses.counters:
+        if counter["title"].casefold() == name.strip().casefold():
+            codes = [code for code, key in statuses.counter_of.items() if key == counter["key"]]
+            if len(codes) == 1:
+                return codes[0]
+    raise ValueError(f"неизвестный статус: {name}")
+
+
+def command_generate(args):
+    """Заполняет незаполненные дни периода по ограничениям и сохраняет его"""
+    db = open_manager(args)
+    statuses = db.statuses
+    try:
+        coverage = {}
+        for item in args.coverage:
+            name, _, count = item.rpartition("=")
+            coverage[parse_status(statuses, name)] = int(count)
+        pattern = tuple(map(int, args.pattern.split("/"))) if args.pattern else None
+        if pattern is not None and (len(pattern) != 2 or pattern[0] < 1 or pattern[1] < 0):
+            raise ValueError(f"график задается как РАБОТА/ОТДЫХ: {args.pattern}")
+        # Статус ставится только сотрудникам указанных должностей
+        eligible = {}
+        for item in args.position or []:
+            name, _, position = item.partition("=")
+            eligible.setdefault(parse_status(statuses, name), set()).update(
+                emp["id"] for emp in db.employees if emp.get("position") == position.strip())
+        off_status = parse_status(statuses, args.off) if args.off else None
+        data, changed, shortages = RosterGenerator(db).generate(
+            args.period, coverage, max_shifts=args.max_shifts, pattern=pattern,
+            eligible=eligible or None, off_status=off_status)
+    except ValueError as e:
+        print(f"Ошибка: {e}", file=sys.stderr)
+        return 2
+
+    for day, code, missing in shortages:
+        print(f"{day:02d}: не хватает {missing} ({statuses.labels[code]})")
+    if args.dry_run:
+        print(f"Проверка: изменились бы строки сотрудников: {len(changed)}")
+        return 1 if shortages else 0
+    try:
+        saved = not changed or db.save_schedule(args.period, data, changed)
+    except PeriodChangedError as e:
+        # Месяц сохранили из окна программы во время заполнения
+        print(f"Ошибка: {e}, запустите команду снова", file=sys.stderr)
+        return 2
+    if not saved:
+        print("Не удалось сохранить период", file=sys.stderr)
+        return 2
+    print(f"Период {args.period} заполнен, изменено строк: {len(changed)}, дней с нехваткой: {len(shortages)}")
+    return 1 if shortages else 0
+
+
+def positive_int(value):
+    """Тип аргумента argparse: целое число больше нуля"""
+    try:
+        number = int(value)
+    except ValueError:
+        number = 0
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"нужно целое число больше нуля: {value}")
+    return number
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="schedule_app.py", description="Расписание смен без окна приложения")
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument("--data", default=".", help="папка с employees.json и schedules (по умолчанию текущая)")
+    common.add_argument("--storage", choices=["auto", "json", "packed", "sqlite"], default="auto",
+                        help="формат хранения (auto: sqlite, если есть schedule.db, "
+                             "packed, если есть упакованные периоды)")
+    period_range = argparse.ArgumentParser(add_help=False)
+    period_range.add_argument("--from", dest="first", metavar="ГГГГ-ММ", help="первый период")
+    period_range.add_argument("--to", dest="last", metavar="ГГГГ-ММ", help="последний период")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    export = commands.add_parser("export", parents=[common], help="экспорт всех месяцев в Excel")
+    export.add_argument("--folder", required=True, help="папка для файла Excel")
+    export.add_argument("--force", action="store_true", help="перезаписать файл, даже если данные не менялись")
+    export.add_argument("--workers", type=int, default=None, help="число процессов (по умолчанию по числу ядер)")
+    export.set_defaults(handler=command_export)
+
+    report = commands.add_parser("report", parents=[common, period_range], help="итоги по сотрудникам")
+    grouping = report.add_mutually_exclusive_group()
+    grouping.add_argument("--by-period", action="store_true", help="отдельная строка на каждый месяц")
+    grouping.add_argument("--by-team", action="store_true", help="итоги по должностям")
+    grouping.add_argument("--rolling", type=positive_int, metavar="МЕСЯЦЕВ",
+                          help="скользящие суммы за указанное число месяцев на каждый период")
+    report.add_argument("--output", help="файл CSV (по умолчанию вывод в консоль)")
+    report.set_defaults(handler=command_report)
+
+    validate = commands.add_parser("validate", parents=[common, period_range], help="проверка файлов периодов")
+    validate.set_defaults(handler=command_validate)
+
+    generate = commands.add_parser("generate", parents=[common], help="автоматическое заполнение месяца")
+    generate.add_argument("--period", required=True, metavar="ГГГГ-ММ", help="заполняемый месяц")
+    generate.add_argument("--min", dest="coverage", action="append", required=True, metavar="СТАТУС=ЧИСЛО",
+                          help="минимум сотрудников в день со статусом (подпись, код или столбец: Рег=3)")
+    generate.add_argument("--max-shifts", type=int, help="наибольшее число смен сотрудника за месяц")
+    generate.add_argument("--pattern", metavar="РАБОТА/ОТДЫХ", help="график смен, например 2/2")
+    generate.add_argument("--position", action="append", metavar="СТАТУС=ДОЛЖНОСТЬ",
+                          help="ставить статус только сотрудникам должности (можно несколько раз)")
+    generate.add_argument("--off", metavar="СТАТУС", help="статус дней без смены (по умолчанию «Не работает»)")
+    generate.add_argument("--dry-run", action="store_true", help="только показать результат, не сохраняя")
+    generate.set_defaults(handler=command_generate)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    return args.handler(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,2114 @@
+"""Работа с данными расписания без графического интерфейса.
+
+Хранение периодов и сотрудников, сводки и экспорт в Excel. Модуль не зависит
+от PyQt5, поэтому используется и окном приложения, и консольными командами.
+"""
+import json
+import os
+import pathlib
+import hashlib
+import uuid
+import mmap
+import struct
+import sqlite3
+import threading
+import functools
+import heapq
+import re
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from collections import defaultdict, OrderedDict, deque
+from datetime import datetime
+from calendar import monthrange
+
+
+MONTH_NAMES = {
+    1: "Январь", 2: "Февраль", 3: "Март", 4: "Апрель",
+    5: "Май", 6: "Июнь", 7: "Июль", 8: "Август",
+    9: "Сентябрь", 10: "Октябрь", 11: "Ноябрь", 12: "Декабрь"
+}
+
+DAY_NAMES = ["Пн", "Вт", "Ср", "Чт", "Пт", "Сб", "Вс"]
+
+
+def hours_to_hours_minutes(total_hours):
+    """Конвертирует дробное количество часов в часы и минуты"""
+    hours = int(total_hours)
+    minutes = int(round((total_hours - hours) * 60))
+    
+    # Корректировка, если минуты равны 60
+    if minutes == 60:
+        hours += 1
+        minutes = 0
+        
+    return hours, minutes
+
+
+def make_note(end_time):
+    """Примечание о раннем окончании смены (смены начинаются в 8:00); None, если время неверное"""
+    try:
+        hour, minutes = map(int, end_time.split(':'))
+    except ValueError:
+        return None
+    if not (0 <= hour <= 23 and 0 <= minutes <= 59):
+        return None
+    return {'end_time': f"{hour:02d}:{minutes:02d}", 'worked_hours': round(hour - 8 + minutes / 60.0, 2)}
+
+
+def schedule_hash(data):
+    """Хэш содержимого периода, не зависящий от форматирования файла"""
+    raw = json.dumps(data, ensure_ascii=False, sort_keys=True, separators=(',', ':'))
+    return hashlib.sha1(raw.encode('utf-8')).hexdigest()
+
+
+class PeriodChangedError(Exception):
+    """Период изменен другим процессом после чтения: запись затерла бы его изменения"""
+    def __init__(self, period):
+        super().__init__(f"Период {period} изменен другой программой")
+        self.period = period
+
+
+def name_key(name):
+    """Ключ имени сотрудника для поиска без учета регистра"""
+    return name.casefold()
+
+
+class WorkCalendar:
+    """Производственный календарь: какие дни месяца показываются в таблице.
+
+    Рабочая неделя, праздники и перенесенные рабочие дни читаются из
+    calendar.json рядом с employees.json; без файла скрываются только
+    воскресенья. Дни месяца и названия дней недели вычисляются один раз на
+    месяц и запоминаются.
+    """
+    CONFIG_FILE = "calendar.json"
+    # Дни недели рабочей недели: 0 - понедельник ... 6 - воскресенье
+    DEFAULT_WORK_WEEK = (0, 1, 2, 3, 4, 5)
+
+    def __init__(self, config=None):
+        config = config or {}
+        self.work_week = frozenset(config.get("work_week", self.DEFAULT_WORK_WEEK))
+        if not self.work_week <= set(range(7)):
+            raise ValueError(f"Дни рабочей недели должны быть числами от 0 до 6: {sorted(self.work_week, key=str)}")
+        # Праздники скрываются, перенесенные рабочие дни показываются даже в выходной
+        self.holidays = frozenset(self._parse_dates(config.get("holidays", [])))
+        self.workdays = frozenset(self._parse_dates(config.get("workdays", [])))
+        self.fingerprint = schedule_hash({"work_week": sorted(self.work_week),
+                                          "holidays": sorted(self.holidays), "workdays": sorted(self.workdays)})
+        self._months = {}
+
+    @staticmethod
+    def _parse_dates(values):
+        """Даты ГГГГ-ММ-ДД из настроек в кортежи (год, месяц, день)"""
+        dates = []
+        for value in values:
+            date = datetime.strptime(value, "%Y-%m-%d")
+            dates.append((date.year, date.month, date.day))
+        return dates
+
+    @classmethod
+    def load(cls, path=None):
+        """Календарь из файла настроек; без файла - шестидневная неделя"""
+        path = path or cls.CONFIG_FILE
+        if not os.path.exists(path):
+            return cls()
+        with open(path, 'r', encoding='utf-8') as f:
+            return cls(json.load(f))
+
+    def month(self, year, month):
+        """(дней в месяце, показываемые дни, названия их дней недели) с запоминанием"""
+        key = (year, month)
+        cached = self._months.get(key)
+        if cached is None:
+            first_weekday, days_in_month = monthrange(year, month)
+            mapping = []
+            names = []
+            for day in range(1, days_in_month + 1):
+                weekday = (first_weekday + day - 1) % 7
+                date = (year, month, day)
+                if date in self.workdays or (weekday in self.work_week and date not in self.holidays):
+                    mapping.append(day)
+                    names.append(DAY_NAMES[weekday])
+            cached = self._months[key] = (days_in_month, tuple(mapping), tuple(names))
+        return cached
+
+    def days_in_month(self, year, month):
+        return self.month(year, month)[0]
+
+    def day_mapping(self, year, month):
+        """Фактические дни месяца, которые показываются в таблице"""
+        return self.month(year, month)[1]
+
+    def day_names(self, year, month):
+        """Названия дней недели для показываемых дней"""
+        return self.month(year, month)[2]
+
+    def working_days_count(self, year, month):
+        return len(self.month(year, month)[1])
+
+
+# Текст ячейки с примечанием: "Колл-центр до 18:30"
+CELL_NOTE_RE = re.compile(r"^(.*?)\s+до\s+(\d{1,2}:\d{2})$")
+
+
+class StatusRegistry:
+    """Справочник статусов ячеек: подписи, цвета, часы смены и столбцы подсчета.
+
+    Читается из statuses.json рядом с employees.json, без файла действуют
+    статусы по умолчанию. Таблицы поиска по коду и по цвету строятся один раз,
+    их используют таблица окна, счетчики, горячие клавиши и экспорт.
+    """
+    CONFIG_FILE = "statuses.json"
+    DEFAULT_CONFIG = {
+        "statuses": [
+            {"code": 0, "label": "Колл-центр", "color": "#77FF77", "hours": 12, "shift": True, "counter": "call_center"},
+            {"code": 1, "label": "Регистратура", "color": "#7777FF", "hours": 12, "shift": True, "counter": "registry"},
+            {"code": 2, "label": "Не работает", "color": "#FF7777"},
+            {"code": 3, "label": "Отпуск", "color": "#FFFF77"},
+            {"code": 4, "label": "Пусто", "color": "#FFFFFF"}
+        ],
+        # Столбцы подсчета между "Смены" и "Часы"
+        "counters": [
+            {"key": "registry", "title": "Рег"},
+            {"key": "call_center", "title": "КЦ"}
+        ],
+        "empty": 4,  # статус незаполненной ячейки
+        "absent": 2  # статус дней сотрудника без строки расписания
+    }
+
+    def __init__(self, config=None):
+        config = dict(self.DEFAULT_CONFIG, **(config or {}))
+        self.statuses = []
+        for entry in config["statuses"]:
+            code = entry["code"]
+            # Статус хранится байтом в упакованном формате
+            if not isinstance(code, int) or not 0 <= code <= 255:
+                raise ValueError(f"Код статуса должен быть числом от 0 до 255: {code!r}")
+            shift = bool(entry.get("shift", False))
+            self.statuses.append({
+                "code": code,
+                "label": entry.get("label", str(code)),
+                "color": entry.get("color", "#FFFFFF").lstrip('#').upper(),
+                "hours": entry.get("hours", 0) if shift else 0,
+                "shift": shift,
+                "counter": entry.get("counter") if shift else None,
+                "shortcut": entry.get("shortcut", f"Ctrl+{code}" if code < 10 else None)
+            })
+        self.by_code = {status["code"]: status for status in self.statuses}
+        if len(self.by_code) != len(self.statuses):
+            raise ValueError("Коды статусов повторяются")
+
+        self.codes = tuple(self.by_code)
+        self.labels = {code: status["label"] for code, status in self.by_code.items()}
+        self.colors = {code: status["color"] for code, status in self.by_code.items()}
+        self.code_by_color = {color: code for code, color in self.colors.items()}
+        # Распознавание вставленного текста: подпись без учета регистра
+        self.code_by_label = {label.casefold(): code for code, label in self.labels.items()}
+        self.style_keys = {code: f"day{code}" for code in self.codes}
+        # Часы за смену по статусам, которые считаются рабочими
+        self.shift_hours = {code: status["hours"] for code, status in self.by_code.items() if status["shift"]}
+        self.counter_of = {code: status["counter"] for code, status in self.by_code.items() if status["counter"]}
+
+        self.counters = [dict(counter) for counter in config["counters"]]
+        counter_keys = [counter["key"] for counter in self.counters]
+        unknown = set(self.counter_of.values()) - set(counter_keys)
+        if unknown:
+            raise ValueError(f"Статусы ссылаются на неизвестные столбцы подсчета: {sorted(unknown)}")
+        # Итоги строки: смены, столбцы подсчета по порядку, часы
+        self.total_keys = ["shifts"] + counter_keys + ["hours"]
+        self.total_titles = ["Смены"] + [counter["title"] for counter in self.counters] + ["Часы"]
+
+        self.empty = config["empty"]
+        self.absent = config["absent"]
+        if self.empty not in self.by_code or self.absent not in self.by_code:
+            raise ValueError("Статусы empty и absent должны быть в списке статусов")
+        # Статусы, дни которых показываются в аналитике отдельно (отпуск, не работает)
+        self.absence_codes = tuple(code for code in self.codes
+                                   if code not in self.shift_hours and code != self.empty)
+        self.fingerprint = schedule_hash({"statuses": self.statuses, "counters": self.counters,
+                                          "empty": self.empty, "absent": self.absent})
+
+    @classmethod
+    def load(cls, path=None):
+        """Справочник из файла настроек; без файла - статусы по умолчанию"""
+        path = path or cls.CONFIG_FILE
+        if not os.path.exists(path):
+            return cls()
+        with open(path, 'r', encoding='utf-8') as f:
+            return cls(json.load(f))
+
+    def __contains__(self, code):
+        return code in self.by_code
+
+    def __iter__(self):
+        return iter(self.statuses)
+
+    def new_totals(self):
+        """Пустые итоги строки"""
+        totals = dict.fromkeys(self.total_keys, 0)
+        totals["hours"] = 0.0
+        return totals
+
+    def add_to_totals(self, totals, status, note, sign=1):
+        """Прибавляет (sign=1) или вычитает (sign=-1) вклад ячейки в итоги строки.
+
+        Возвращает True, если ячейка - рабочая смена.
+        """
+        hours = self.shift_hours.get(status)
+        if hours is None:
+            return False
+        totals["shifts"] += sign
+        counter = self.counter_of.get(status)
+        if counter is not None:
+            totals[counter] += sign
+        if note is not None:
+            hours = note.get('worked_hours', hours)
+        # Округление не дает накапливаться погрешности дробных часов
+        totals["hours"] = round(totals["hours"] + sign * hours, 6)
+        return True
+
+    def cell_text(self, status, note):
+        """Текст ячейки для буфера обмена: подпись статуса и время окончания из примечания"""
+        label = self.labels.get(status, str(status))
+        if note is not None and note.get('end_time'):
+            return f"{label} до {note['end_time']}"
+        return label
+
+    def parse_cell_text(self, text):
+        """(статус, примечание) по тексту ячейки - подписи или коду; None, если не распознан.
+
+        Пустая ячейка - незаполненный день, время окончания учитывается только у смен.
+        """
+        text = text.strip()
+        if not text:
+            return self.empty, None
+        match = CELL_NOTE_RE.match(text)
+        label, end_time = match.groups() if match else (text, None)
+        code = self.code_by_label.get(label.casefold())
+        if code is None and label.isdigit() and int(label) in self.by_code:
+            code = int(label)
+        if code is None:
+            return None
+        note = make_note(end_time) if end_time and code in self.shift_hours else None
+        return code, note
+
+    def export_styles(self):
+        """Стили экспорта: общие из EXPORT_STYLES, столбцы подсчета и статусы дней"""
+        styles = dict(EXPORT_STYLES)
+        for counter in self.counters:
+            # Столбец подсчета по умолчанию окрашен цветом своего первого статуса
+            color = counter.get("color") or next(
+                (self.colors[code] for code, key in self.counter_of.items() if key == counter["key"]), "FFFFFF")
+            styles[counter["key"]] = (color.lstrip('#').upper(), True, True)
+        for code, key in self.style_keys.items():
+            styles[key] = (self.colors[code], False, True)
+        return styles
+
+
+DEFAULT_STATUSES = StatusRegistry()
+DEFAULT_CALENDAR = WorkCalendar()
+
+
+def pack_statuses(rows, days_in_month, fill):
+    """Строки статусов в один массив байтов: строка за строкой по days_in_month байт.
+
+    Короткие строки дополняются статусом fill, значения вне 0-255 заменяются на него.
+    """
+    packed = bytearray(bytes([fill]) * (days_in_month * len(rows)))
+    for row, days in enumerate(rows):
+        days = days[:days_in_month]
+        start = row * days_in_month
+        try:
+            packed[start:start + len(days)] = bytes(days)
+        except (TypeError, ValueError):
+            packed[start:start + len(days)] = bytes(status if isinstance(status, int) and 0 <= status <= 255
+                                                    else fill for status in days)
+    return packed
+
+
+def aggregate_statuses(statuses, row_count, days_in_month, day_mapping, notes, registry=None, status_days=False):
+    """Итоги по строкам и число работающих по дням для массива статусов периода.
+
+    statuses - байты статусов строка за строкой (см. pack_statuses), notes -
+    {(строка, индекс дня): примечание}. Подсчет идет операциями над байтами
+    (выборка видимых дней, translate, count и срезы с шагом), поэтому месяц на
+    тысячу сотрудников считается за миллисекунды. Примечания поправляют часы
+    смены. Возвращает (итоги строк как в StatusRegistry.new_totals, работающие по дням);
+    при status_days=True в итоги строки добавляется "status_days" - {код статуса: дней}.
+    """
+    registry = registry or DEFAULT_STATUSES
+    width = len(day_mapping)
+    visible = [day - 1 for day in day_mapping]
+    # Матрица только видимых дней: строка за строкой по width байт
+    if width == days_in_month:
+        grid = bytes(statuses[:row_count * days_in_month])
+    else:
+        grid = bytes(map(statuses.__getitem__,
+                         [row * days_in_month + day_index for row in range(row_count) for day_index in visible]))
+
+    shift_hours = registry.shift_hours
+    counter_of = registry.counter_of
+    row_totals = []
+    for row in range(row_count):
+        totals = registry.new_totals()
+        line = grid[row * width:(row + 1) * width]
+        hours = 0.0
+        for code, code_hours in shift_hours.items():
+            count = line.count(code)
+            if count:
+                totals["shifts"] += count
+                if code in counter_of:
+                    totals[counter_of[code]] += count
+                hours += count * code_hours
+        totals["hours"] = hours
+        if status_days:
+            # Ключи - строки, как после чтения сводки из JSON
+            totals["status_days"] = {str(code): count for code, count in
+                                     ((code, line.count(code)) for code in registry.codes) if count}
+        row_totals.append(totals)
+
+    # Примечание заменяет часы смены на отработанные
+    visible_days = set(visible)
+    for (row, day_index), note in notes.items():
+        if row < row_count and day_index in visible_days and note:
+            code = statuses[row * days_in_month + day_index]
+            if code in shift_hours:
+                row_totals[row]["hours"] += note.get('worked_hours', shift_hours[code]) - shift_hours[code]
+    for totals in row_totals:
+        totals["hours"] = round(totals["hours"], 6)
+
+    # Число работающих по дням: маска смен и подсчет по столбцам срезами с шагом
+    mask = grid.translate(bytes(1 if code in shift_hours else 0 for code in range(256)))
+    working_counts = [mask[col::width].count(1) for col in range(width)] if width else []
+    return row_totals, working_counts
+
+
+def format_cell_block(block, registry):
+    """Блок ячеек [[(статус, примечание)]] текстом с табуляциями, как его копирует Excel"""
+    return "\n".join("\t".join(registry.cell_text(*cell) for cell in row) for row in block)
+
+
+def parse_cell_block(text, registry):
+    """Блок [[(статус, примечание) или None]] из текста с табуляциями (Excel, другое окно)"""
+    lines = text.replace("\r\n", "\n").split("\n")
+    # Excel завершает последнюю строку переводом строки
+    if lines and not lines[-1]:
+        lines.pop()
+    return [[registry.parse_cell_text(cell) for cell in line.split("\t")] for line in lines]
+
+
+def period_notes(emp_ids, notes):
+    """Примечания периода по строкам: {(строка, индекс дня): примечание}"""
+    result = {}
+    for row, emp_id in enumerate(emp_ids):
+        for day_key, note in notes.get(emp_id, {}).items():
+            if day_key.isdigit():
+                result[(row, int(day_key))] = note
+    return result
+
+
+def summarize_period(period, data, statuses=None, calendar=None):
+    """Сводка по периоду: размеры и итоги по сотрудникам (смены, столбцы подсчета, часы, дни по статусам)"""
+    statuses = statuses or DEFAULT_STATUSES
+    calendar = calendar or DEFAULT_CALENDAR
+    schedule = data.get('schedule', {})
+    try:
+        year, month = map(int, period.split('-'))
+        days_in_month, day_mapping, _ = calendar.month(year, month)
+    except ValueError:
+        days_in_month = max((len(days) for days in schedule.values()), default=0)
+        day_mapping = list(range(1, days_in_month + 1))
+    
+    notes = data.get('notes', {})
+    emp_ids = list(schedule)
+    row_totals, _ = aggregate_statuses(
+        pack_statuses([schedule[emp_id] for emp_id in emp_ids], days_in_month, statuses.empty),
+        len(emp_ids), days_in_month, day_mapping, period_notes(emp_ids, notes), statuses, status_days=True)
+    totals = dict(zip(emp_ids, row_totals))
+    
+    return {
+        "days": days_in_month,
+        "working_days": len(day_mapping),
+        "employees": len(data.get('employees', [])),
+        "rows": len(schedule),
+        "hash": schedule_hash(data),
+        "totals": totals
+    }
+
+
+def synchronized(method):
+    """Выполняет метод менеджера под его блокировкой (сохранение идет и из фонового потока)"""
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        with self._lock:
+            return method(self, *args, **kwargs)
+    return wrapper
+
+
+class PackedSchedule:
+    """Упакованный формат периода: байт на день сотрудника, чтение через mmap.
+
+    Раскладка файла: заголовок фиксированной длины, JSON с метаданными периода
+    (список сотрудников и порядок строк), массив статусов с фиксированным шагом
+    (строка на сотрудника, байт на день) и разреженная таблица примечаний.
+    """
+    MAGIC = b"SCHD"
+    VERSION = 1
+    HEADER = struct.Struct("<4sHHIII")  # magic, версия, дней, сотрудников, длина метаданных, длина примечаний
+
+    def __init__(self, path):
+        with open(path, 'rb') as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, self.days, count, meta_len, notes_len = self.HEADER.unpack_from(self._mm, 0)
+        if magic != self.MAGIC or version != self.VERSION:
+            self.close()
+            raise ValueError(f"Неизвестный формат файла: {path}")
+        offset = self.HEADER.size
+        self.meta = json.loads(self._mm[offset:offset + meta_len].decode('utf-8'))
+        self.names = self.meta.pop("rows")
+        self._index = {name: row for row, name in enumerate(self.names)}
+        self._statuses_offset = offset + meta_len
+        self._notes_offset = self._statuses_offset + count * self.days
+        self._notes_len = notes_len
+        self._notes = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        if self._mm is not None:
+            self._mm.close()
+            self._mm = None
+
+    def row(self, name):
+        """Статусы сотрудника за месяц (срез байтов без разбора всего файла)"""
+        start = self._statuses_offset + self._index[name] * self.days
+        return self._mm[start:start + self.days]
+
+    def notes(self):
+        if self._notes is None:
+            raw = self._mm[self._notes_offset:self._notes_offset + self._notes_len]
+            self._notes = json.loads(raw.decode('utf-8')) if raw else {}
+        return self._notes
+
+    def to_dict(self):
+        data = dict(self.meta)
+        data['schedule'] = {name: list(self.row(name)) for name in self.names}
+        data['notes'] = self.notes()
+        return data
+
+    @classmethod
+    def write(cls, path, data, empty=None):
+        """Записывает период; короткие строки дополняются пустым статусом empty"""
+        if empty is None:
+            empty = DEFAULT_STATUSES.empty
+        schedule = data.get('schedule', {})
+        names = list(schedule)
+        days = max((len(v) for v in schedule.values()), default=0)
+        meta = {k: v for k, v in data.items() if k not in ("schedule", "notes")}
+        meta["rows"] = names
+        meta_bytes = json.dumps(meta, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+        notes = data.get('notes', {})
+        notes_bytes = json.dumps(notes, ensure_ascii=False, separators=(',', ':')).encode('utf-8') if notes else b""
+
+        statuses = pack_statuses([schedule[name] for name in names], days, empty)
+
+        with open(path, 'wb') as f:
+            f.write(cls.HEADER.pack(cls.MAGIC, cls.VERSION, days, len(names), len(meta_bytes), len(notes_bytes)))
+            f.write(meta_bytes)
+            f.write(statuses)
+            f.write(notes_bytes)
+            f.flush()
+            os.fsync(f.fileno())
+
+
+class PeriodCache:
+    """LRU-кэш загруженных периодов с ограничением по числу записей и/или объему.
+
+    Каждая запись хранит сигнатуру источника (mtime/размер файлов или хэш
+    содержимого); при несовпадении сигнатуры запись считается устаревшей.
+    """
+    def __init__(self, max_entries=24, max_bytes=None, on_evict=None):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.on_evict = on_evict
+        self._entries = OrderedDict()  # период -> (данные, сигнатура, размер)
+        self.total_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def __contains__(self, period):
+        return period in self._entries
+
+    def __len__(self):
+        return len(self._entries)
+
+    @staticmethod
+    def estimate_size(data):
+        """Приблизительный объем периода в памяти (ссылки списков и словари примечаний)"""
+        schedule = data.get('schedule', {})
+        notes = data.get('notes', {})
+        return (sum(len(days) for days in schedule.values()) * 8
+                + len(schedule) * 200
+                + sum(len(emp_notes) for emp_notes in notes.values()) * 300)
+
+    def get(self, period, signature):
+        entry = self._entries.get(period)
+        if entry is None:
+            self.misses += 1
+            return None
+        if entry[1] != signature:
+            # Файл изменился на диске (например, на другой машине)
+            self.invalidations += 1
+            self.misses += 1
+            self.pop(period)
+            return None
+        self._entries.move_to_end(period)
+        self.hits += 1
+        return entry[0]
+
+    def put(self, period, data, signature):
+        if period in self._entries:
+            self.total_bytes -= self._entries.pop(period)[2]
+        size = self.estimate_size(data)
+        self._entries[period] = (data, signature, size)
+        self.total_bytes += size
+        self._evict()
+
+    def pop(self, period):
+        entry = self._entries.pop(period, None)
+        if entry is not None:
+            self.total_bytes -= entry[2]
+            if self.on_evict:
+                self.on_evict(period)
+
+    def clear(self):
+        for period in list(self._entries):
+            self.pop(period)
+
+    def _evict(self):
+        # Последняя добавленная запись не вытесняется, даже если она одна превышает лимит
+        while len(self._entries) > 1 and (
+                (self.max_entries is not None and len(self._entries) > self.max_entries)
+                or (self.max_bytes is not None and self.total_bytes > self.max_bytes)):
+            period = next(iter(self._entries))
+            self.pop(period)
+            self.evictions += 1
+
+    def stats(self):
+        return {
+            "entries": len(self._entries),
+            "bytes": self.total_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations
+        }
+
+
+class ScheduleManager:
+    # После скольких изменений в журнале он сворачивается в базовый JSON
+    JOURNAL_COMPACT_THRESHOLD = 500
+
+    # Расширения файлов периодов для поддерживаемых форматов хранения
+    FORMAT_EXTENSIONS = {"json": ".json", "packed": ".sched"}
+    MANIFEST_VERSION = 3
+
+    def __init__(self, storage_format="json", cache_entries=24, cache_bytes=None, cache_validation="stat",
+                 read_only=False):
+        self.schedule_folder = "schedules"
+        self.employees_file = "employees.json"
+        self.storage_format = storage_format if storage_format in self.FORMAT_EXTENSIONS else "json"
+        self.manifest_file = os.path.join(self.schedule_folder, "periods.manifest")
+        # Проверка актуальности кэша: "stat" (mtime и размер), "hash" (содержимое) или None
+        self.cache_validation = cache_validation
+        # Только чтение (проверка, перенос данных): старые форматы переводятся на id
+        # в памяти, а файлы периодов, сотрудников и манифеста не перезаписываются
+        self.read_only = read_only
+        self.statuses = StatusRegistry.load()
+        self.calendar = WorkCalendar.load()
+        self._lock = threading.RLock()
+        if not read_only:
+            os.makedirs(self.schedule_folder, exist_ok=True)
+        self.employees = self.load_employees()
+        self._index_employees()
+        self._cache = PeriodCache(cache_entries, cache_bytes, on_evict=self._forget_period)
+        # Последнее записанное на диск состояние периода (для вычисления дельт)
+        self._persisted = {}
+        # Сигнатура файлов периода после его последнего чтения или записи этим процессом;
+        # в отличие от снимков не вытесняется вместе с кэшем
+        self._disk_signatures = {}
+        self._manifest = None
+        self._manifest_signature = None
+        self._manifest_journal_entries = 0
+        # Идет пересборка манифеста: сводки собираются в памяти и пишутся один раз
+        self._rebuilding_manifest = False
+        # Периоды, сводки которых нужно пересчитать перед выдачей
+        self._stale_summaries = set()
+    
+    def load_employees(self):
+        if os.path.exists(self.employees_file):
+            try:
+                with open(self.employees_file, 'r', encoding='utf-8') as f:
+                    return json.load(f)
+            except:
+                return []
+        return []
+    
+    def save_employees(self):
+        if self.read_only:
+            return True
+        try:
+            with open(self.employees_file, 'w', encoding='utf-8') as f:
+                json.dump(self.employees, f, ensure_ascii=False, indent=2)
+            return True
+        except:
+            return False
+    
+    def _index_employees(self):
+        """Строит индексы сотрудников по id и по имени без учета регистра"""
+        self._employees_by_id = {}
+        self._employees_by_key = {}
+        assigned = False
+        for emp in self.employees:
+            if not emp.get("id"):
+                # Старый формат без идентификаторов
+                emp["id"] = uuid.uuid4().hex[:12]
+                assigned = True
+            self._employees_by_id[emp["id"]] = emp
+            self._employees_by_key.setdefault(name_key(emp["name"]), emp)
+        if assigned:
+            self.save_employees()
+    
+    def _save_employee(self, emp):
+        """Сохраняет одну запись сотрудника (для файла - весь список)"""
+        return self.save_employees()
+    
+    def get_employee(self, emp_id):
+        return self._employees_by_id.get(emp_id)
+    
+    def find_employee(self, name):
+        return self._employees_by_key.get(name_key(name))
+    
+    def employee_name(self, emp_id):
+        emp = self._employees_by_id.get(emp_id)
+        return emp["name"] if emp else emp_id
+    
+    @synchronized
+    def rename_employee(self, emp_id, new_name):
+        """Переименовывает сотрудника; файлы периодов ссылаются на id и не меняются"""
+        emp = self._employees_by_id.get(emp_id)
+        other = self.find_employee(new_name)
+        if emp is None or (other is not None and other is not emp):
+            return False
+        old_name = emp["name"]
+        emp["name"] = new_name
+        if not self._save_employee(emp):
+            emp["name"] = old_name
+            return False
+        del self._employees_by_key[name_key(old_name)]
+        self._employees_by_key[name_key(new_name)] = emp
+        return True
+    
+    def _ensure_employee(self, name, position=""):
+        emp = self.find_employee(name)
+        if emp is None:
+            emp = {"id": uuid.uuid4().hex[:12], "name": name, "position": position}
+            self._insert_employee(emp)
+        return emp
+    
+    def _upgrade_legacy_period(self, data):
+        """Переводит период старого формата (ключи - имена) на id сотрудников"""
+        employees = data.get('employees', [])
+        if not any(isinstance(emp, dict) for emp in employees):
+            return False
+        ids = {}
+        for emp in employees:
+            ids[emp["name"]] = self._ensure_employee(emp["name"], emp.get("position", ""))["id"]
+        for name in list(data.get('schedule', {})) + list(data.get('notes', {})):
+            if name not in ids:
+                ids[name] = self._ensure_employee(name)["id"]
+        data['employees'] = [ids[emp["name"]] for emp in employees]
+        data['schedule'] = {ids[name]: days for name, days in data.get('schedule', {}).items()}
+        data['notes'] = {ids[name]: notes for name, notes in data.get('notes', {}).items()}
+        return True
+    
+    def _resolve_employee_key(self, data, key):
+        """Ключ строки для записи журнала (старые журналы ссылаются на имена)"""
+        if key in data['schedule']:
+            return key
+        emp = self.find_employee(key)
+        return emp["id"] if emp else key
+    
+    @synchronized
+    def get_periods(self):
+        # Сортировка по возрастанию (сначала старые, потом новые)
+        return sorted(self._load_manifest())
+    
+    @synchronized
+    def get_period_summaries(self):
+        """Сводки всех периодов из манифеста без чтения файлов периодов"""
+        manifest = self._load_manifest()
+        if self._stale_summaries:
+            for period in self._stale_summaries & manifest.keys():
+                self._update_manifest(period, self.load_schedule(period))
+            self._stale_summaries.clear()
+        return self._manifest
+    
+    def period_summary(self, period):
+        return self.get_period_summaries().get(period)
+    
+    def _list_periods(self):
+        periods = set()
+        extensions = tuple(self.FORMAT_EXTENSIONS.values())
+        for filename in os.listdir(self.schedule_folder):
+            if filename.endswith(extensions):
+                periods.add(os.path.splitext(filename)[0])
+        return periods
+    
+    @property
+    def manifest_journal_file(self):
+        return self.manifest_file + ".journal"
+    
+    def _manifest_file_signature(self):
+        """mtime и размер манифеста и его журнала (None, если манифеста нет)"""
+        signature = []
+        for path in (self.manifest_file, self.manifest_journal_file):
+            try:
+                st = os.stat(path)
+                signature.append((st.st_mtime_ns, st.st_size))
+            except OSError:
+                signature.append(None)
+        return tuple(signature) if signature[0] is not None else None
+    
+    def _load_manifest(self):
+        """Возвращает манифест периодов, перечитывая файлы только при их изменении"""
+        signature = self._manifest_file_signature()
+        if self._manifest is not None and signature == self._manifest_signature:
+            return self._manifest
+        if signature is None:
+            return self.rebuild_manifest()
+        try:
+            with open(self.manifest_file, 'r', encoding='utf-8') as f:
+                manifest = json.load(f)
+            # Итоги в сводках зависят от справочника статусов и календаря
+            if (manifest.get("version") != self.MANIFEST_VERSION
+                    or manifest.get("settings") != self.settings_fingerprint):
+                return self.rebuild_manifest()
+            periods = manifest["periods"]
+            entries = self._replay_manifest_journal(periods)
+        except (OSError, ValueError, KeyError, TypeError):
+            return self.rebuild_manifest()
+        self._manifest = periods
+        self._manifest_signature = signature
+        self._manifest_journal_entries = entries
+        return self._manifest
+    
+    def _replay_manifest_journal(self, periods):
+        """Применяет к манифесту сводки из журнала, возвращает число записей"""
+        if not os.path.exists(self.manifest_journal_file):
+            return 0
+        entries = 0
+        with open(self.manifest_journal_file, 'r', encoding='utf-8') as f:
+            for line in f:
+                # Оборванная запись (сбой во время записи) - манифест пересобирается
+                record = json.loads(line)
+                periods[record["period"]] = record["summary"]
+                entries += 1
+        return entries
+    
+    @property
+    def settings_fingerprint(self):
+        """Отпечаток настроек (статусы и календарь), от которых зависят сводки и экспорт"""
+        return schedule_hash([self.statuses.fingerprint, self.calendar.fingerprint])
+    
+    @synchronized
+    def rebuild_manifest(self):
+        """Пересобирает манифест, читая все периоды (если он отсутствует или поврежден)"""
+        manifest = {}
+        # Перевод старых периодов на id при чтении сохраняет их и обновляет сводку:
+        # без флага каждое такое сохранение запускало бы новую пересборку
+        self._rebuilding_manifest = True
+        try:
+            for period in sorted(self._list_periods()):
+                data = self.load_schedule(period)
+                if data is not None:
+                    manifest[period] = summarize_period(period, data, self.statuses, self.calendar)
+        finally:
+            self._rebuilding_manifest = False
+        self._manifest = manifest
+        self._write_manifest()
+        return manifest
+    
+    def _write_manifest(self):
+        """Записывает манифест целиком и очищает его журнал"""
+        if self.read_only:
+            # Манифест остается в памяти; файл на диске считается прочитанным
+            self._manifest_signature = self._manifest_file_signature()
+            return
+        tmp_path = self.manifest_file + ".tmp"
+        try:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump({"version": self.MANIFEST_VERSION, "settings": self.settings_fingerprint,
+                           "periods": self._manifest},
+                          f, ensure_ascii=False, separators=(',', ':'))
+            os.replace(tmp_path, self.manifest_file)
+            if os.path.exists(self.manifest_journal_file):
+                os.remove(self.manifest_journal_file)
+            self._manifest_journal_entries = 0
+            self._manifest_signature = self._manifest_file_signature()
+        except OSError:
+            # Манифест - производные данные: при следующем запуске он будет пересобран
+            self._manifest_signature = None
+    
+    def _update_manifest(self, period, data):
+        """Обновляет сводку одного периода дописыванием в журнал манифеста.
+
+        Манифест переписывается целиком, когда записей в журнале становится
+        больше, чем периодов: журнал не перерастает сам манифест.
+        """
+        if self._rebuilding_manifest or self.read_only:
+            # Сводку запишет пересборка; в режиме чтения манифест не пишется
+            return
+        manifest = self._load_manifest()
+        summary = summarize_period(period, data, self.statuses, self.calendar)
+        manifest[period] = summary
+        if self._manifest_journal_entries >= len(manifest):
+            self._write_manifest()
+            return
+        try:
+            record = json.dumps({"period": period, "summary": summary}, ensure_ascii=False, separators=(',', ':'))
+            with open(self.manifest_journal_file, 'a', encoding='utf-8') as f:
+                f.write(record + "\n")
+            self._manifest_journal_entries += 1
+            self._manifest_signature = self._manifest_file_signature()
+        except OSError:
+            self._write_manifest()
+    
+    def _schedule_path(self, period, storage_format=None):
+        extension = self.FORMAT_EXTENSIONS[storage_format or self.storage_format]
+        return os.path.join(self.schedule_folder, f"{period}{extension}")
+    
+    def _read_base(self, period):
+        """Читает базовый файл периода в любом из форматов (сначала текущий)"""
+        formats = sorted(self.FORMAT_EXTENSIONS, key=lambda fmt: fmt != self.storage_format)
+        for fmt in formats:
+            filepath = self._schedule_path(period, fmt)
+            if not os.path.exists(filepath):
+                continue
+            if fmt == "packed":
+                with PackedSchedule(filepath) as packed:
+                    return packed.to_dict()
+            with open(filepath, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        return None
+    
+    def _journal_path(self, period):
+        return os.path.join(self.schedule_folder, f"{period}.journal")
+    
+    def _period_signature(self, period):
+        """Сигнатура файлов периода для проверки актуальности кэша"""
+        paths = [self._schedule_path(period, fmt) for fmt in self.FORMAT_EXTENSIONS]
+        paths.append(self._journal_path(period))
+        if self.cache_validation == "hash":
+            digest = hashlib.sha1()
+            for path in paths:
+                try:
+                    with open(path, 'rb') as f:
+                        digest.update(f.read())
+                except OSError:
+                    digest.update(b"-")
+            return digest.hexdigest()
+        if self.cache_validation == "stat":
+            signature = []
+            for path in paths:
+                try:
+                    st = os.stat(path)
+                    signature.append((st.st_mtime_ns, st.st_size))
+                except OSError:
+                    signature.append(None)
+            return tuple(signature)
+        return None
+    
+    def _forget_period(self, period):
+        # Снимок для дельт без закэшированных данных не нужен
+        self._persisted.pop(period, None)
+    
+    def cache_stats(self):
+        """Счетчики кэша периодов: попадания, промахи, вытеснения, устаревания"""
+        return self._cache.stats()
+    
+    @synchronized
+    def load_schedule(self, period, cache=True):
+        """Данные периода или None; cache=False - прочитать, не занимая место в кэше (выгрузка)"""
+        signature = self._period_signature(period)
+        data = self._cache.get(period, signature)
+        if data is not None:
+            return data
+            
+        try:
+            data = self._read_base(period)
+            if data is not None:
+                if 'notes' not in data:
+                    data['notes'] = {}
+                upgraded = self._upgrade_legacy_period(data)
+                entries = self._replay_journal(period, data)
+                if cache:
+                    self._remember_persisted(period, data, entries)
+                    self._cache.put(period, data, signature)
+                    self._disk_signatures[period] = signature
+                if upgraded and not self.read_only:
+                    # Сразу переписываем файл, чтобы дальше он не зависел от имен
+                    self.compact_schedule(period, data)
+                return data
+        except:
+            return None
+        return None
+    
+    def _replay_journal(self, period, data):
+        """Применяет к данным периода изменения из журнала, возвращает число изменений"""
+        journal_path = self._journal_path(period)
+        if not os.path.exists(journal_path):
+            return 0
+        
+        entries = 0
+        offset = valid_end = 0
+        with open(journal_path, 'rb') as f:
+            for line in f:
+                offset += len(line)
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    # Оборванная запись (сбой во время записи) - пропускаем
+                    continue
+                valid_end = offset
+                for emp_id, day_index, status in record.get("cells", []):
+                    emp_schedule = data['schedule'].get(self._resolve_employee_key(data, emp_id))
+                    if emp_schedule is not None and day_index < len(emp_schedule):
+                        emp_schedule[day_index] = status
+                for emp_id, day_index, note in record.get("notes", []):
+                    emp_id = self._resolve_employee_key(data, emp_id)
+                    emp_notes = data['notes'].setdefault(emp_id, {})
+                    if note is None:
+                        emp_notes.pop(str(day_index), None)
+                        if not emp_notes:
+                            del data['notes'][emp_id]
+                    else:
+                        emp_notes[str(day_index)] = note
+                entries += len(record.get("cells", [])) + len(record.get("notes", []))
+        if valid_end < offset and not self.read_only:
+            # Оборванный хвост обрезается, иначе следующая запись склеится с ним
+            try:
+                with open(journal_path, 'r+b') as f:
+                    f.truncate(valid_end)
+            except OSError:
+                pass
+        return entries
+    
+    def _read_period(self, period):
+        """Данные периода с диска без кэша и без записи (для сравнения со снимком)"""
+        data = self._read_base(period)
+        if data is not None:
+            data.setdefault('notes', {})
+            self._replay_journal(period, data)
+        return data
+    
+    @synchronized
+    def period_changed_on_disk(self, period):
+        """True, если период изменен другим процессом после последнего чтения или записи"""
+        known = self._disk_signatures.get(period)
+        if known is None:
+            return False
+        signature = self._period_signature(period)
+        if signature == known:
+            return False
+        persisted = self._persisted.get(period)
+        if persisted is not None:
+            data = self._read_period(period)
+            header = {k: v for k, v in data.items() if k not in ("schedule", "notes")} if data else None
+            if (data is not None and header == persisted["header"]
+                    and data['schedule'] == persisted["schedule"] and data['notes'] == persisted["notes"]):
+                # Сигнатура изменилась без изменения периода (запись в другой месяц базы SQLite)
+                self._disk_signatures[period] = signature
+                return False
+        return True
+    
+    def _remember_persisted(self, period, data, entries=0):
+        # Заголовок копируется глубоко, т.к. вызывающий код меняет списки на месте
+        header = {k: v for k, v in data.items() if k not in ("schedule", "notes")}
+        self._persisted[period] = {
+            "header": json.loads(json.dumps(header)),
+            "schedule": {name: list(days) for name, days in data.get('schedule', {}).items()},
+            "notes": {name: {k: dict(v) for k, v in notes.items()} for name, notes in data.get('notes', {}).items()},
+            "entries": entries
+        }
+    
+    def _diff_schedule(self, persisted, data, changed_rows=None):
+        """Возвращает дельты по ячейкам или None, если изменилась структура периода.
+
+        changed_rows - id сотрудников, строки которых могли измениться; остальные
+        строки не сравниваются.
+        """
+        header = {k: v for k, v in data.items() if k not in ("schedule", "notes")}
+        schedule = data.get('schedule', {})
+        if header != persisted["header"] or schedule.keys() != persisted["schedule"].keys():
+            return None
+        
+        rows = schedule.keys() if changed_rows is None else changed_rows
+        cells = []
+        for emp_id in rows:
+            days = schedule[emp_id]
+            old_days = persisted["schedule"][emp_id]
+            if len(days) != len(old_days):
+                return None
+            if days != old_days:
+                cells.extend([emp_id, day_index, status]
+                             for day_index, (status, old_status) in enumerate(zip(days, old_days))
+                             if status != old_status)
+        
+        notes = []
+        new_notes = data.get('notes', {})
+        old_notes = persisted["notes"]
+        note_rows = new_notes.keys() | old_notes.keys() if changed_rows is None else changed_rows
+        for emp_id in note_rows:
+            emp_new = new_notes.get(emp_id, {})
+            emp_old = old_notes.get(emp_id, {})
+            for key in emp_new.keys() | emp_old.keys():
+                if emp_new.get(key) != emp_old.get(key):
+                    notes.append([emp_id, int(key), emp_new.get(key)])
+        return cells, notes
+    
+    def _apply_to_persisted(self, persisted, cells, notes):
+        """Переносит записанные дельты в снимок (O(изменений) вместо полного копирования)"""
+        for emp_id, day_index, status in cells:
+            persisted["schedule"][emp_id][day_index] = status
+        for emp_id, day_index, note in notes:
+            emp_notes = persisted["notes"].setdefault(emp_id, {})
+            if note is None:
+                emp_notes.pop(str(day_index), None)
+                if not emp_notes:
+                    del persisted["notes"][emp_id]
+            else:
+                emp_notes[str(day_index)] = dict(note)
+        persisted["entries"] += len(cells) + len(notes)
+    
+    @synchronized
+    def save_schedule(self, period, data, changed_rows=None):
+        """Сохраняет период; changed_rows - id сотрудников, строки которых менялись.
+
+        Если период изменен другим процессом после чтения, вызывает PeriodChangedError.
+        """
+        if self.period_changed_on_disk(period):
+            raise PeriodChangedError(period)
+        persisted = self._persisted.get(period)
+        delta = self._diff_schedule(persisted, data, changed_rows) if persisted else None
+        
+        if delta is None or persisted["entries"] + len(delta[0]) + len(delta[1]) > self.JOURNAL_COMPACT_THRESHOLD:
+            return self.compact_schedule(period, data)
+        
+        cells, notes = delta
+        if cells or notes:
+            try:
+                # Одна строка на сохранение: при сбое теряется только она целиком
+                record = json.dumps({"cells": cells, "notes": notes}, ensure_ascii=False, separators=(',', ':'))
+                with open(self._journal_path(period), 'a+b') as f:
+                    # Предыдущая запись без перевода строки не должна склеиться с новой
+                    end = f.seek(0, os.SEEK_END)
+                    if end:
+                        f.seek(end - 1)
+                        if f.read(1) != b"\n":
+                            record = "\n" + record
+                    f.write((record + "\n").encode('utf-8'))
+                    f.flush()
+                    os.fsync(f.fileno())
+            except:
+                # Неизвестно, что попало на диск: следующее сохранение запишет период целиком
+                self._persisted.pop(period, None)
+                return False
+            self._apply_to_persisted(persisted, cells, notes)
+        signature = self._period_signature(period)
+        self._cache.put(period, data, signature)
+        self._disk_signatures[period] = signature
+        if cells or notes:
+            self._update_manifest(period, data)
+        return True
+    
+    @synchronized
+    def compact_schedule(self, period, data=None):
+        """Записывает период целиком в базовый JSON и очищает журнал"""
+        if data is None:
+            data = self.load_schedule(period)
+            if data is None:
+                return False
+        
+        filepath = self._schedule_path(period)
+        tmp_path = filepath + ".tmp"
+        try:
+            if self.storage_format == "packed":
+                PackedSchedule.write(tmp_path, data, self.statuses.empty)
+            else:
+                with open(tmp_path, 'w', encoding='utf-8') as f:
+                    json.dump(data, f, ensure_ascii=False, indent=2)
+                    f.flush()
+                    os.fsync(f.fileno())
+            # Атомарная замена: старый файл остается целым до последнего момента
+            os.replace(tmp_path, filepath)
+            # Файл периода в другом формате больше не актуален
+            for fmt in self.FORMAT_EXTENSIONS:
+                other_path = self._schedule_path(period, fmt)
+                if other_path != filepath and os.path.exists(other_path):
+                    os.remove(other_path)
+            if os.path.exists(self._journal_path(period)):
+                os.remove(self._journal_path(period))
+        except:
+            self._persisted.pop(period, None)
+            return False
+        signature = self._period_signature(period)
+        self._cache.put(period, data, signature)
+        self._disk_signatures[period] = signature
+        self._remember_persisted(period, data)
+        self._update_manifest(period, data)
+        return True
+    
+    @synchronized
+    def add_employee(self, name):
+        if self.find_employee(name) is not None:
+            return False
+        return self._insert_employee({"id": uuid.uuid4().hex[:12], "name": name, "position": ""})
+    
+    def _insert_employee(self, emp):
+        self.employees.append(emp)
+        self._employees_by_id[emp["id"]] = emp
+        self._employees_by_key[name_key(emp["name"])] = emp
+        if self._save_employee(emp):
+            return True
+        self.employees.pop()
+        del self._employees_by_id[emp["id"]]
+        del self._employees_by_key[name_key(emp["name"])]
+        return False
+
+
+class SqliteScheduleManager(ScheduleManager):
+    """Хранение периодов и сотрудников в локальной базе SQLite.
+
+    Ячейки хранятся построчно с ключом (период, сотрудник, день), поэтому
+    изменение одной ячейки и запросы по нескольким месяцам не требуют
+    загрузки месяцев целиком.
+    """
+    def __init__(self, database_file="schedule.db", cache_entries=24, cache_bytes=None, read_only=False):
+        self.schedule_folder = "schedules"
+        self.employees_file = "employees.json"
+        self.storage_format = "sqlite"
+        self.read_only = read_only
+        self.statuses = StatusRegistry.load()
+        self.calendar = WorkCalendar.load()
+        self.database_file = database_file
+        self.manifest_file = os.path.splitext(database_file)[0] + ".manifest"
+        self._manifest = None
+        self._manifest_signature = None
+        self._manifest_journal_entries = 0
+        self._rebuilding_manifest = False
+        self._stale_summaries = set()
+        is_new = not os.path.exists(database_file)
+        # Соединение используется и из потока сохранения, поэтому доступ через блокировку
+        self._lock = threading.RLock()
+        if read_only:
+            uri = pathlib.Path(database_file).absolute().as_uri() + "?mode=ro"
+            self._conn = sqlite3.connect(uri, uri=True, check_same_thread=False)
+        else:
+            self._conn = sqlite3.connect(database_file, check_same_thread=False)
+            self._create_tables()
+        self._cache = PeriodCache(cache_entries, cache_bytes, on_evict=self._forget_period)
+        self._persisted = {}
+        self._disk_signatures = {}
+        if is_new and not read_only:
+            self.migrate_from_json()
+        self.employees = self.load_employees()
+        self._index_employees()
+    
+    def _create_tables(self):
+        with self._lock, self._conn:
+            self._conn.executescript("""
+                CREATE TABLE IF NOT EXISTS employees (
+                    id TEXT PRIMARY KEY,
+                    name_key TEXT NOT NULL UNIQUE,
+                    name TEXT NOT NULL,
+                    position TEXT NOT NULL DEFAULT '',
+                    ord INTEGER NOT NULL
+                );
+                CREATE TABLE IF NOT EXISTS periods (
+                    period TEXT PRIMARY KEY,
+                    meta TEXT NOT NULL
+                );
+                CREATE TABLE IF NOT EXISTS cells (
+                    period TEXT NOT NULL,
+                    employee TEXT NOT NULL,
+                    day INTEGER NOT NULL,
+                    status INTEGER NOT NULL,
+                    PRIMARY KEY (period, employee, day)
+                ) WITHOUT ROWID;
+                CREATE INDEX IF NOT EXISTS cells_by_employee ON cells (employee, period);
+                CREATE TABLE IF NOT EXISTS notes (
+                    period TEXT NOT NULL,
+                    employee TEXT NOT NULL,
+                    day INTEGER NOT NULL,
+                    data TEXT NOT NULL,
+                    PRIMARY KEY (period, employee, day)
+                ) WITHOUT ROWID;
+            """)
+    
+    def migrate_from_json(self, source=None):
+        """Однократный перенос сотрудников и всех периодов из папки с JSON-файлами"""
+        if source is None:
+            if not os.path.isdir(self.schedule_folder) and not os.path.exists(self.employees_file):
+                return 0
+            # Исходные файлы не меняются: старые периоды переводятся на id только в памяти
+            source = ScheduleManager(read_only=True)
+        
+        periods = sorted(source._list_periods())
+        with self._lock, self._conn:
+            for period in periods:
+                data = source.load_schedule(period, cache=False)
+                if data is not None:
+                    self._write_period(period, data)
+            # Перевод старых периодов мог добавить сотрудников, поэтому список пишется последним
+            self._write_employees(source.employees)
+        return len(periods)
+    
+    def load_employees(self):
+        with self._lock:
+            rows = self._conn.execute("SELECT id, name, position FROM employees ORDER BY ord").fetchall()
+        return [{"id": emp_id, "name": name, "position": position} for emp_id, name, position in rows]
+    
+    def _write_employees(self, employees):
+        self._conn.execute("DELETE FROM employees")
+        self._conn.executemany(
+            "INSERT OR IGNORE INTO employees (id, name_key, name, position, ord) VALUES (?, ?, ?, ?, ?)",
+            [(emp.get("id") or uuid.uuid4().hex[:12], name_key(emp["name"]), emp["name"], emp.get("position", ""), i)
+             for i, emp in enumerate(employees)])
+    
+    def save_employees(self):
+        if self.read_only:
+            return True
+        try:
+            with self._lock, self._conn:
+                self._write_employees(self.employees)
+            return True
+        except sqlite3.Error:
+            return False
+    
+    def _save_employee(self, emp):
+        """Добавляет или обновляет одну строку сотрудника (переименование - один UPDATE)"""
+        if self.read_only:
+            return True
+        try:
+            with self._lock, self._conn:
+                self._conn.execute(
+                    "INSERT INTO employees (id, name_key, name, position, ord) "
+                    "VALUES (?, ?, ?, ?, (SELECT COALESCE(MAX(ord), -1) + 1 FROM employees)) "
+                    "ON CONFLICT (id) DO UPDATE SET name_key = excluded.name_key, "
+                    "name = excluded.name, position = excluded.position",
+                    (emp["id"], name_key(emp["name"]), emp["name"], emp.get("position", "")))
+        except sqlite3.IntegrityError:
+            # name_key уникален: сотрудник с таким именем уже есть
+            return False
+        return True
+    
+    def _list_periods(self):
+        with self._lock:
+            return {row[0] for row in self._conn.execute("SELECT period FROM periods")}
+    
+    def _period_signature(self, period):
+        # data_version меняется только при записи из других соединений
+        with self._lock:
+            return self._conn.execute("PRAGMA data_version").fetchone()[0]
+    
+    @synchronized
+    def load_schedule(self, period, cache=True):
+        """Данные периода или None; cache=False - прочитать, не занимая место в кэше (выгрузка)"""
+        signature = self._period_signature(period)
+        data = self._cache.get(period, signature)
+        if data is not None:
+            return data
+        
+        data = self._read_period(period)
+        if data is None:
+            return None
+        upgraded = self._upgrade_legacy_period(data)
+        if cache:
+            self._remember_persisted(period, data)
+            self._cache.put(period, data, signature)
+            self._disk_signatures[period] = signature
+        if upgraded and not self.read_only:
+            self.compact_schedule(period, data)
+        return data
+    
+    def _read_period(self, period):
+        with self._lock:
+            row = self._conn.execute("SELECT meta FROM periods WHERE period = ?", (period,)).fetchone()
+            if row is None:
+                return None
+            data = json.loads(row[0])
+            rows = data.pop("rows")
+            days = data.pop("days")
+            data['schedule'] = {name: [self.statuses.empty] * days for name in rows}
+            for employee, day, status in self._conn.execute(
+                    "SELECT employee, day, status FROM cells WHERE period = ?", (period,)):
+                # Ячейки без строки сотрудника или за пределами месяца пропускаются, как в журнале
+                emp_schedule = data['schedule'].get(employee)
+                if emp_schedule is not None and 0 <= day < len(emp_schedule):
+                    emp_schedule[day] = status
+            data['notes'] = {}
+            for employee, day, note in self._conn.execute(
+                    "SELECT employee, day, data FROM notes WHERE period = ?", (period,)):
+                data['notes'].setdefault(employee, {})[str(day)] = json.loads(note)
+        return data
+    
+    def _write_period(self, period, data):
+        """Полностью перезаписывает период (вызывается внутри транзакции)"""
+        schedule = data.get('schedule', {})
+        meta = {k: v for k, v in data.items() if k not in ("schedule", "notes")}
+        meta["rows"] = list(schedule)
+        meta["days"] = max((len(v) for v in schedule.values()), default=0)
+        self._conn.execute("INSERT OR REPLACE INTO periods (period, meta) VALUES (?, ?)",
+                           (period, json.dumps(meta, ensure_ascii=False)))
+        self._conn.execute("DELETE FROM cells WHERE period = ?", (period,))
+        self._conn.execute("DELETE FROM notes WHERE period = ?", (period,))
+        # Пустые ячейки не храним: они подставляются при чтении
+        empty = self.statuses.empty
+        self._conn.executemany(
+            "INSERT INTO cells (period, employee, day, status) VALUES (?, ?, ?, ?)",
+            ((period, name, day, status)
+             for name, days in schedule.items()
+             for day, status in enumerate(days) if status != empty))
+        self._conn.executemany(
+            "INSERT INTO notes (period, employee, day, data) VALUES (?, ?, ?, ?)",
+            ((period, name, int(key), json.dumps(note, ensure_ascii=False))
+             for name, emp_notes in data.get('notes', {}).items()
+             for key, note in emp_notes.items()))
+    
+    def _write_cells(self, period, cells, notes):
+        """Записывает изменения отдельных ячеек и примечаний (внутри транзакции)"""
+        empty = self.statuses.empty
+        self._conn.executemany(
+            "DELETE FROM cells WHERE period = ? AND employee = ? AND day = ?",
+            ((period, name, day) for name, day, status in cells if status == empty))
+        self._conn.executemany(
+            "INSERT OR REPLACE INTO cells (period, employee, day, status) VALUES (?, ?, ?, ?)",
+            ((period, name, day, status) for name, day, status in cells if status != empty))
+        self._conn.executemany(
+            "DELETE FROM notes WHERE period = ? AND employee = ? AND day = ?",
+            ((period, name, day) for name, day, note in notes if note is None))
+        self._conn.executemany(
+            "INSERT OR REPLACE INTO notes (period, employee, day, data) VALUES (?, ?, ?, ?)",
+            ((period, name, day, json.dumps(note, ensure_ascii=False))
+             for name, day, note in notes if note is not None))
+    
+    @synchronized
+    def save_schedule(self, period, data, changed_rows=None):
+        if self.period_changed_on_disk(period):
+            raise PeriodChangedError(period)
+        persisted = self._persisted.get(period)
+        delta = self._diff_schedule(persisted, data, changed_rows) if persisted else None
+        try:
+            with self._lock, self._conn:
+                if delta is None:
+                    self._write_period(period, data)
+                else:
+                    self._write_cells(period, *delta)
+        except sqlite3.Error:
+            self._persisted.pop(period, None)
+            return False
+        signature = self._period_signature(period)
+        self._cache.put(period, data, signature)
+        self._disk_signatures[period] = signature
+        if delta is None:
+            self._remember_persisted(period, data)
+        else:
+            self._apply_to_persisted(persisted, *delta)
+        self._update_manifest(period, data)
+        return True
+    
+    @synchronized
+    def compact_schedule(self, period, data=None):
+        if data is None:
+            return self.load_schedule(period) is not None
+        try:
+            with self._lock, self._conn:
+                self._write_period(period, data)
+        except sqlite3.Error:
+            return False
+        signature = self._period_signature(period)
+        self._cache.put(period, data, signature)
+        self._disk_signatures[period] = signature
+        self._remember_persisted(period, data)
+        self._update_manifest(period, data)
+        return True
+    
+    @synchronized
+    def set_cell(self, period, employee, day_index, status):
+        """Изменяет одну ячейку без загрузки месяца; False для неизвестных периода,
+        сотрудника, дня или статуса
+        """
+        if status not in self.statuses.codes:
+            return False
+        try:
+            with self._lock, self._conn:
+                row = self._conn.execute("SELECT meta FROM periods WHERE period = ?", (period,)).fetchone()
+                if row is None:
+                    return False
+                meta = json.loads(row[0])
+                if employee not in meta["rows"] or not 0 <= day_index < meta["days"]:
+                    return False
+                self._write_cells(period, [(employee, day_index, status)], [])
+        except sqlite3.Error:
+            return False
+        # Загруженная копия периода и его сводка устарели
+        self._cache.pop(period)
+        self._stale_summaries.add(period)
+        return True
+    
+    def status_counts(self, first_period, last_period, employee=None):
+        """Количество дней каждого статуса по сотрудникам за диапазон периодов"""
+        query = ("SELECT employee, status, COUNT(*) FROM cells "
+                 "WHERE period BETWEEN ? AND ?")
+        params = [first_period, last_period]
+        if employee is not None:
+            query += " AND employee = ?"
+            params.append(employee)
+        query += " GROUP BY employee, status"
+        
+        result = defaultdict(dict)
+        with self._lock:
+            for name, status, count in self._conn.execute(query, params):
+                result[name][status] = count
+        return dict(result)
+
+
+def create_schedule_manager(storage_format="json", read_only=False):
+    """Менеджер данных для формата хранения из настроек: json, packed или sqlite"""
+    if storage_format == "sqlite":
+        return SqliteScheduleManager(read_only=read_only)
+    return ScheduleManager(storage_format, read_only=read_only)
+
+
+def period_month_index(period):
+    """Номер месяца периода ГГГГ-ММ от начала летоисчисления (для окон по месяцам)"""
+    year, month = map(int, period.split('-'))
+    if not 1 <= month <= 12:
+        raise ValueError(f"Неверный месяц периода: {period}")
+    return year * 12 + month - 1
+
+
+class ScheduleAnalytics:
+    """Итоги по сотрудникам и должностям за произвольные диапазоны периодов.
+
+    Суммируются только сводки периодов из манифеста (summarize_period), файлы
+    периодов не читаются, поэтому диапазон в несколько лет считается сразу.
+    Итоги содержат смены, столбцы подсчета, часы, дни по статусам
+    ("status_days") и число месяцев ("periods").
+    """
+    NO_TEAM = "Без должности"
+
+    def __init__(self, db):
+        self.db = db
+
+    def new_totals(self):
+        totals = self.db.statuses.new_totals()
+        totals["status_days"] = {}
+        totals["periods"] = 0
+        return totals
+
+    def add_totals(self, target, totals, sign=1):
+        """Прибавляет (sign=1) или вычитает (sign=-1) итоги сотрудника за месяц"""
+        for key in self.db.statuses.total_keys:
+            target[key] += sign * totals.get(key, 0)
+        target["hours"] = round(target["hours"], 6)
+        days = target["status_days"]
+        for code, count in totals.get("status_days", {}).items():
+            days[code] = days.get(code, 0) + sign * count
+        target["periods"] += sign * totals.get("periods", 1)
+
+    def periods(self, first=None, last=None):
+        """Периоды манифеста от first до last включительно"""
+        return [period for period in sorted(self.db.get_period_summaries())
+                if (first is None or period >= first) and (last is None or period <= last)]
+
+    def employee_totals(self, first=None, last=None):
+        """{id сотрудника: итоги} за периоды от first до last"""
+        summaries = self.db.get_period_summaries()
+        result = {}
+        for period in self.periods(first, last):
+            for emp_id, totals in summaries[period]["totals"].items():
+                self.add_totals(result.setdefault(emp_id, self.new_totals()), totals)
+        return result
+
+    def team_of(self, emp_id):
+        emp = self.db.get_employee(emp_id)
+        return (emp or {}).get("position") or self.NO_TEAM
+
+    def team_totals(self, first=None, last=None, employee_totals=None):
+        """{должность: итоги} за периоды; "periods" - сумма месяцев сотрудников, "employees" - их число"""
+        if employee_totals is None:
+            employee_totals = self.employee_totals(first, last)
+        result = {}
+        for emp_id, totals in employee_totals.items():
+            team = result.setdefault(self.team_of(emp_id), dict(self.new_totals(), employees=0))
+            self.add_totals(team, totals)
+            team["employees"] += 1
+        return result
+
+    def rolling_totals(self, first=None, last=None, months=12):
+        """{период: {id сотрудника: итоги за months месяцев, заканчивая этим периодом}}
+
+        Окно сдвигается по периодам: итоги входящего месяца прибавляются,
+        выпавшего - вычитаются. Периоды с именем не в формате ГГГГ-ММ пропускаются.
+        """
+        if months < 1:
+            raise ValueError(f"Окно должно быть не меньше месяца: {months}")
+        summaries = self.db.get_period_summaries()
+        indexed = []
+        for period in sorted(summaries):
+            try:
+                indexed.append((period_month_index(period), period))
+            except ValueError:
+                continue
+
+        result = {}
+        window = {}
+        start = 0
+        for index, period in indexed:
+            for emp_id, totals in summaries[period]["totals"].items():
+                self.add_totals(window.setdefault(emp_id, self.new_totals()), totals)
+            while indexed[start][0] <= index - months:
+                for emp_id, totals in summaries[indexed[start][1]]["totals"].items():
+                    self.add_totals(window[emp_id], totals, -1)
+                start += 1
+            if (first is None or period >= first) and (last is None or period <= last):
+                result[period] = {emp_id: dict(totals, status_days={code: count for code, count
+                                                                    in totals["status_days"].items() if count})
+                                  for emp_id, totals in window.items() if totals["periods"]}
+        return result
+
+
+class RosterGenerator:
+    """Автоматическое заполнение периода сменами по ограничениям.
+
+    Меняются только незаполненные ячейки показываемых дней: отпуска и дни,
+    отмеченные вручную, остаются и учитываются в часах и числе смен. На каждый
+    день набирается минимальное число сотрудников по статусам смен (coverage),
+    из доступных берутся наименее загруженные. Затем локальный поиск переносит
+    смены от самых загруженных сотрудников к наименее загруженным, пока это
+    уменьшает разброс часов. Оставшиеся незаполненные дни получают off_status.
+    """
+    # Сколько самых загруженных сотрудников проверяется на каждом шаге переноса
+    REBALANCE_DONORS = 20
+
+    def __init__(self, db):
+        self.db = db
+        self.statuses = db.statuses
+        self.calendar = db.calendar
+
+    def generate(self, period, coverage, max_shifts=None, pattern=None, eligible=None,
+                 off_status=None, data=None):
+        """Заполняет период, не сохраняя его.
+
+        coverage - {статус смены: минимум сотрудников в день}, pattern - (дней
+        работы, дней отдыха) со сдвигом по сотрудникам, eligible - {статус: id
+        сотрудников, которым его можно ставить}. Возвращает (данные периода,
+        id сотрудников с измененными строками, нехватка [(день месяца, статус, не хватает)]).
+        """
+        statuses = self.statuses
+        unknown = [code for code in coverage if code not in statuses.shift_hours]
+        if unknown:
+            raise ValueError(f"Статусы {unknown} не являются сменами")
+        off_status = statuses.absent if off_status is None else off_status
+        if data is None:
+            data = self.db.load_schedule(period)
+        if not data or not data.get("employees"):
+            raise ValueError(f"Период {period} не найден или в нем нет сотрудников")
+        year, month = map(int, period.split('-'))
+        days_in_month, day_mapping, _ = self.calendar.month(year, month)
+
+        empty = statuses.empty
+        emp_ids = list(data["employees"])
+        schedule = data.get("schedule", {})
+        notes = data.get("notes", {})
+        rows = []
+        for emp_id in emp_ids:
+            row = list(schedule.get(emp_id, []))[:days_in_month]
+            rows.append(row + [empty] * (days_in_month - len(row)))
+        original = [list(row) for row in rows]
+
+        # Уже отмеченные смены входят в часы и лимит смен
+        hours, shifts = [], []
+        for emp_id, row in zip(emp_ids, rows):
+            totals = statuses.new_totals()
+            emp_notes = notes.get(emp_id, {})
+            for day_index, status in enumerate(row):
+                statuses.add_to_totals(totals, status, emp_notes.get(str(day_index)))
+            hours.append(totals["hours"])
+            shifts.append(totals["shifts"])
+        limit = days_in_month if max_shifts is None else max_shifts
+        pools = {code: [i for i, emp_id in enumerate(emp_ids)
+                        if eligible is None or code not in eligible or emp_id in eligible[code]]
+                 for code in coverage}
+
+        def available(i, day_index):
+            if rows[i][day_index] != empty or shifts[i] >= limit:
+                return False
+            if pattern is None:
+                return True
+            # Сотрудники сдвинуты по циклу графика, чтобы смены шли равномерно
+            on, off = pattern
+            return (day_index + i) % (on + off) < on
+
+        def assign(i, day_index, code):
+            rows[i][day_index] = code
+            shifts[i] += 1
+            hours[i] = round(hours[i] + statuses.shift_hours[code], 6)
+
+        def unassign(i, day_index):
+            code = rows[i][day_index]
+            rows[i][day_index] = empty
+            shifts[i] -= 1
+            hours[i] = round(hours[i] - statuses.shift_hours[code], 6)
+
+        assigned = defaultdict(list)  # сотрудник -> [(индекс дня, статус)] назначенных смен
+        shortages = []
+        for actual_day in day_mapping:
+            day_index = actual_day - 1
+            for code, need in coverage.items():
+                missing = need - sum(1 for row in rows if row[day_index] == code)
+                if missing <= 0:
+                    continue
+                candidates = [i for i in pools[code] if available(i, day_index)]
+                # Меньше часов, затем без смены накануне
+                chosen = heapq.nsmallest(missing, candidates, key=lambda i: (
+                    hours[i], day_index > 0 and rows[i][day_index - 1] in statuses.shift_hours, i))
+                for i in chosen:
+                    assign(i, day_index, code)
+                    assigned[i].append((day_index, code))
+                if len(chosen) < missing:
+                    shortages.append((actual_day, code, missing - len(chosen)))
+
+        self._rebalance(assigned, hours, pools, available, assign, unassign)
+
+        for row in rows:
+            for actual_day in day_mapping:
+                if row[actual_day - 1] == empty:
+                    row[actual_day - 1] = off_status
+
+        result = dict(data)
+        result["schedule"] = dict(schedule)
+        changed = set()
+        for emp_id, row, before in zip(emp_ids, rows, original):
+            if row != before:
+                result["schedule"][emp_id] = row
+                changed.add(emp_id)
+        return result, changed, shortages
+
+    def _rebalance(self, assigned, hours, pools, available, assign, unassign):
+        """Переносит назначенные смены, пока перенос уменьшает разброс часов"""
+        members = {code: set(pool) for code, pool in pools.items()}
+        # Перенос смены короче разрыва в часах уменьшает разброс
+        shortest = min(self.statuses.shift_hours[code] for code in pools)
+        receivers = sorted(set().union(*pools.values()), key=lambda i: hours[i])
+        moves = sum(len(days) for days in assigned.values())
+        while moves > 0:
+            moves -= 1
+            donors = heapq.nlargest(self.REBALANCE_DONORS, assigned, key=lambda i: hours[i])
+            receivers.sort(key=lambda i: hours[i])
+            move = None
+            for donor in donors:
+                for receiver in receivers:
+                    gap = hours[donor] - hours[receiver]
+                    if gap <= shortest:
+                        break
+                    move = next(((day_index, code) for day_index, code in assigned[donor]
+                                 if gap > self.statuses.shift_hours[code]
+                                 and receiver in members[code] and available(receiver, day_index)), None)
+                    if move is not None:
+                        break
+                if move is not None:
+                    break
+            if move is None:
+                return
+            day_index, code = move
+            assigned[donor].remove(move)
+            if not assigned[donor]:
+                del assigned[donor]
+            unassign(donor, day_index)
+            assign(receiver, day_index, code)
+            assigned[receiver].append(move)
+
+
+def render_period_block(period, data, employee_names, max_working_days, statuses=None, calendar=None):
+    """Отрисовывает блок периода для листа Excel без обращения к openpyxl.
+
+    Возвращает словарь с заголовком месяца и строками ячеек [столбец, значение,
+    ключ стиля]; такой блок можно кэшировать и записывать в любой лист.
+    """
+    statuses = statuses or DEFAULT_STATUSES
+    calendar = calendar or DEFAULT_CALENDAR
+    try:
+        year, month = map(int, period.split('-'))
+        month_name = f"{MONTH_NAMES[month]} {year}"
+        days_in_month, day_mapping, day_names = calendar.month(year, month)
+        working_days_count = len(day_mapping)
+    except (ValueError, KeyError):
+        year = month = None
+        month_name = period
+        working_days_count = len(next(iter(data['schedule'].values())))
+        day_mapping = list(range(1, working_days_count + 1))
+        days_in_month = working_days_count
+
+    # ФИКСИРОВАННЫЕ ПОЗИЦИИ СТОЛБЦОВ
+    result_columns_start = max_working_days + 2  # +1 для столбца "Сотрудник", +1 для отступа
+    result_columns = list(zip(statuses.total_titles, statuses.total_keys))
+
+    employees = data.get('employees', [])
+    notes_data = data.get('notes', {})
+
+    # Итоги строк и число работающих по дням - одним подсчетом по массиву статусов
+    packed = pack_statuses([data['schedule'].get(emp_id, [statuses.absent] * days_in_month) for emp_id in employees],
+                           days_in_month, statuses.absent)
+    row_totals, working_counts = aggregate_statuses(packed, len(employees), days_in_month, day_mapping,
+                                                    period_notes(employees, notes_data), statuses)
+
+    rows = []
+
+    # Заголовки столбцов
+    header = [[1, "Сотрудник", "header"]]
+    for col, actual_day in enumerate(day_mapping):
+        if year is not None:
+            header_text = f"{actual_day}\n{day_names[col]}\n({working_counts[col]})"
+        else:
+            header_text = str(actual_day)
+        header.append([col + 2, header_text, "header"])
+    for offset, (title, style) in enumerate(result_columns):
+        header.append([result_columns_start + offset, title, style])
+    rows.append(header)
+
+    # Данные сотрудников
+    for row_index, (emp_id, emp_name) in enumerate(zip(employees, employee_names)):
+        row = [[1, emp_name, "name"]]
+        base = row_index * days_in_month
+        emp_notes = notes_data.get(emp_id, {})
+        totals = row_totals[row_index]
+
+        for col, actual_day in enumerate(day_mapping):
+            day_index = actual_day - 1
+            status = packed[base + day_index]
+            note = emp_notes.get(str(day_index))
+
+            if note is not None:
+                row.append([col + 2, note.get('end_time', '20:00'), statuses.style_keys.get(status)])
+            elif status != statuses.empty:
+                row.append([col + 2, "", statuses.style_keys.get(status)])
+            # Пустые ячейки без заметки не записываются и остаются без стиля
+
+        hours, minutes = hours_to_hours_minutes(totals["hours"])
+        values = [totals[key] for key in statuses.total_keys[:-1]] + [f"{hours}ч {minutes}м"]
+        for offset, ((_, style), value) in enumerate(zip(result_columns, values)):
+            row.append([result_columns_start + offset, value, style])
+        rows.append(row)
+
+    return {"title": month_name, "rows": rows}
+
+
+def get_column_letter(col):
+    """Буквенное обозначение столбца Excel по номеру (1 -> A, 27 -> AA)"""
+    letters = ""
+    while col > 0:
+        col, rem = divmod(col - 1, 26)
+        letters = chr(ord('A') + rem) + letters
+    return letters
+
+
+def render_export_chunk(task):
+    """Задача процесса-исполнителя: блок периода для листа.
+
+    Без данных периода блок читается из файла кэша block_path, иначе
+    отрисовывается и записывается в этот файл для следующих выгрузок.
+    """
+    period, block_path, data, names, max_working_days, statuses, calendar = task
+    if data is None:
+        with open(block_path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    else:
+        block = render_period_block(period, data, names, max_working_days, statuses, calendar)
+        tmp_path = block_path + ".tmp"
+        try:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(block, f, ensure_ascii=False, separators=(',', ':'))
+            os.replace(tmp_path, block_path)
+        except OSError:
+            # Кэш необязателен: в следующий раз блок будет отрисован заново
+            pass
+    return block
+
+
+# Именованные стили экспорта: ключ блока -> (цвет заливки, жирный шрифт, рамка).
+# Стили столбцов подсчета по статусам и дней добавляет StatusRegistry.export_styles
+EXPORT_STYLES = {
+    "title": (None, True, False),
+    "name": (None, True, False),
+    "header": ("D3D3D3", True, True),
+    # Цвета для столбцов подсчета
+    "shifts": ("FFA500", True, True),  # Оранжевый
+    "hours": ("FFD700", True, True),  # Золотой
+}
+
+
+class ScheduleExporter:
+    """Экспорт всех периодов на один лист Excel с кэшем отрисованных блоков.
+
+    Блок каждого периода хранится в своем файле, а индекс кэша держит только
+    хэш содержимого из манифеста и имена строк, поэтому неизмененные месяцы
+    не загружаются и не пересчитываются, а если не изменилось ничего, файл не
+    перезаписывается. Строки листа для каждого периода отрисовываются в
+    отдельных процессах и потоком пишутся на диск: в памяти одновременно
+    находятся лишь несколько периодов, сколько бы их ни было.
+    """
+    FILE_NAME = "Расписание_все_месяцы.xlsx"
+    CACHE_VERSION = 4
+    STYLE_PREFIX = "schedule_"
+    # Меньше периодов быстрее отрисовать в текущем процессе, чем запускать пул
+    PARALLEL_MIN_PERIODS = 4
+
+    def __init__(self, db, cache_file=None, workers=None, start_method="spawn"):
+        self.db = db
+        # Кэш блоков экспорта по умолчанию хранится рядом с манифестом периодов
+        self.cache_file = os.path.abspath(cache_file or os.path.join(os.path.dirname(db.manifest_file),
+                                                                     "export_blocks.cache"))
+        # Отрисованные блоки периодов: по файлу на период
+        self.block_dir = os.path.splitext(self.cache_file)[0]
+        self.workers = workers
+        # Запуск процессов отрисовки: "fork" допустим только в однопоточном процессе
+        self.start_method = start_method
+        self._cache = None
+
+    def _load_cache(self):
+        if self._cache is None:
+            try:
+                with open(self.cache_file, 'r', encoding='utf-8') as f:
+                    self._cache = json.load(f)
+                # Блоки отрисованы по справочнику статусов и календарю, с которыми были сохранены
+                if (self._cache.get("version") != self.CACHE_VERSION
+                        or self._cache.get("settings") != self.db.settings_fingerprint):
+                    raise ValueError("устаревший кэш")
+            except (OSError, ValueError):
+                self._cache = {"version": self.CACHE_VERSION, "settings": self.db.settings_fingerprint,
+                               "blocks": {}}
+        return self._cache
+
+    def _save_cache(self):
+        tmp_path = self.cache_file + ".tmp"
+        try:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(self._cache, f, ensure_ascii=False, separators=(',', ':'))
+            os.replace(tmp_path, self.cache_file)
+        except OSError:
+            # Кэш необязателен: в следующий раз блоки будут отрисованы заново
+            pass
+
+    def plan(self):
+        """Возвращает (max_working_days, периоды для выгрузки, сигнатура экспорта)
+
+        Считается только по сводкам манифеста и кэшу, без загрузки периодов.
+        """
+        summaries = self.db.get_period_summaries()
+        periods = [period for period in sorted(summaries)
+                   if summaries[period]["rows"] and summaries[period]["employees"]]
+
+        # Определяем максимальное количество рабочих дней среди всех месяцев
+        max_working_days = max((summaries[period]["working_days"] for period in periods), default=0)
+        # Если не удалось определить, устанавливаем разумный максимум
+        if max_working_days == 0:
+            max_working_days = 31
+
+        blocks = self._load_cache()["blocks"]
+        periods = [(period, summaries[period]["hash"]) for period in periods]
+        names = {period: self.names_hash(blocks[period]["ids"]) for period, _ in periods if period in blocks}
+        return max_working_days, periods, self.signature(max_working_days, periods, names)
+
+    def names_hash(self, emp_ids):
+        """Хэш текущих имен строк блока: переименование делает блок устаревшим"""
+        return schedule_hash([self.db.employee_name(emp_id) for emp_id in emp_ids])
+
+    @staticmethod
+    def signature(max_working_days, periods, names):
+        """Сигнатура выгрузки: хэши периодов [(период, хэш)] и хэши имен строк {период: хэш}"""
+        return schedule_hash({
+            "max_working_days": max_working_days,
+            "periods": [[period, content_hash, names.get(period)] for period, content_hash in periods]
+        })
+
+    def block_path(self, period):
+        return os.path.join(self.block_dir, f"{period}.json")
+
+    def iter_tasks(self, periods, max_working_days, layout):
+        """Задачи отрисовки по периодам с начальными строками блоков на листе.
+
+        Периоды загружаются по мере выдачи задач; периоды с актуальным блоком
+        в кэше не загружаются вовсе. В layout добавляются (период, начальная
+        строка, запись индекса кэша) выданных задач.
+        """
+        blocks = self._load_cache()["blocks"]
+        start_row = 1
+        for period, content_hash in periods:
+            entry = blocks.get(period)
+            if (entry and entry["hash"] == content_hash
+                    and entry["max_working_days"] == max_working_days
+                    and self.names_hash(entry["ids"]) == entry["names"]
+                    and os.path.exists(self.block_path(period))):
+                data = None
+            else:
+                # Выгрузка читает каждый период один раз: кэш менеджера оставляем открытым месяцам
+                data = self.db.load_schedule(period, cache=False)
+                if not data or not data.get('schedule') or not data.get('employees'):
+                    continue
+                entry = {
+                    "hash": content_hash,
+                    "max_working_days": max_working_days,
+                    "ids": list(data['employees']),
+                    "names": self.names_hash(data['employees']),
+                    # Заголовки столбцов + сотрудники
+                    "row_count": len(data['employees']) + 1
+                }
+            layout.append((period, start_row, entry))
+            names = None if data is None else [self.db.employee_name(emp_id) for emp_id in data['employees']]
+            yield (period, self.block_path(period), data, names, max_working_days,
+                   self.db.statuses, self.db.calendar)
+            # Заголовок месяца, строки таблицы и две пустые строки после блока
+            start_row += entry["row_count"] + 3
+
+    def _file_stat(self, file_path):
+        try:
+            st = os.stat(file_path)
+            return [st.st_mtime_ns, st.st_size]
+        except OSError:
+            return None
+
+    def export(self, file_path, force=False):
+        """Записывает файл; возвращает False, если он уже соответствует данным"""
+        max_working_days, periods, signature = self.plan()
+        cache = self._cache
+        if (not force and cache.get("signature") == signature and cache.get("file") == file_path
+                and cache.get("file_stat") is not None and cache.get("file_stat") == self._file_stat(file_path)):
+            return False
+
+        self.write_workbook(file_path, max_working_days, periods)
+        # Сигнатура - по хэшам из плана до записи: сохранение во время экспорта сделает
+        # файл устаревшим для следующего вызова. Имена берутся из записанных блоков
+        written_names = {period: entry["names"] for period, entry in cache["blocks"].items()}
+        cache["signature"] = self.signature(max_working_days, periods, written_names)
+        cache["file"] = file_path
+        cache["file_stat"] = self._file_stat(file_path)
+        self._save_cache()
+        return True
+
+    def register_styles(self, wb):
+        """Регистрирует в книге именованные стили; возвращает ключ блока -> имя стиля"""
+        from openpyxl.styles import PatternFill, Alignment, Font, Border, Side, NamedStyle
+        center_alignment = Alignment(horizontal='center', vertical='center', wrap_text=True)
+        thin_border = Border(left=Side(style='thin'), right=Side(style='thin'),
+                             top=Side(style='thin'), bottom=Side(style='thin'))
+        names = {}
+        for key, (color, bold, boxed) in self.db.statuses.export_styles().items():
+            style = NamedStyle(name=self.STYLE_PREFIX + key)
+            style.font = Font(name="Calibri", size=12 if key == "title" else 11, bold=bold)
+            style.border = thin_border if boxed else Border()
+            if color:
+                style.fill = PatternFill(start_color=color, end_color=color, fill_type="solid")
+            if boxed:
+                style.alignment = center_alignment
+            wb.add_named_style(style)
+            names[key] = style.name
+        return names
+
+    def run_tasks(self, tasks, count):
+        """Выдает результаты задач по порядку, распределяя их по процессам.
+
+        Из итератора задач берется не больше двух задач вперед на процесс,
+        поэтому данные периодов не накапливаются в памяти.
+        """
+        workers = min(self.workers or os.cpu_count() or 1, count)
+        if workers < 2 or count < self.PARALLEL_MIN_PERIODS:
+            yield from map(render_export_chunk, tasks)
+            return
+        context = multiprocessing.get_context(self.start_method)
+        with ProcessPoolExecutor(max_workers=workers, mp_context=context) as pool:
+            pending = deque()
+            for task in tasks:
+                pending.append(pool.submit(render_export_chunk, task))
+                if len(pending) >= workers * 2:
+                    yield pending.popleft().result()
+            while pending:
+                yield pending.popleft().result()
+
+    def write_workbook(self, file_path, max_working_days, periods):
+        """Записывает лист "Расписание": блоки периодов отрисовываются параллельно
+
+        Строки потоком добавляются в книгу openpyxl в режиме write-only, поэтому
+        лист не собирается в памяти целиком.
+        """
+        # openpyxl нужен только для экспорта и загружается при первом обращении
+        from openpyxl import Workbook
+        from openpyxl.cell import WriteOnlyCell
+
+        wb = Workbook(write_only=True)
+        ws = wb.create_sheet("Расписание")
+        styles = self.register_styles(wb)
+
+        def styled(value, style):
+            cell = WriteOnlyCell(ws, value)
+            if style in styles:
+                cell.style = styles[style]
+            return cell
+
+        # Ширина столбцов задается до первой строки: ФИО, дни и результирующие столбцы
+        ws.column_dimensions['A'].width = 30  # Столбец с ФИО
+        for col in range(2, max_working_days + 2):
+            ws.column_dimensions[get_column_letter(col)].width = 4
+        result_count = len(self.db.statuses.total_keys)
+        for col in range(max_working_days + 2, max_working_days + 2 + result_count):
+            ws.column_dimensions[get_column_letter(col)].width = 8
+        # Заголовок месяца объединяет все столбцы включая результирующие
+        total_columns = max_working_days + 1 + result_count  # Сотрудник + дни + результирующие столбцы
+
+        tmp_path = file_path + ".tmp"
+        layout = []
+        try:
+            os.makedirs(self.block_dir, exist_ok=True)
+            tasks = self.iter_tasks(periods, max_working_days, layout)
+            for index, block in enumerate(self.run_tasks(tasks, len(periods))):
+                # Задача блока уже выдана, значит его начальная строка есть в layout
+                start_row = layout[index][1]
+                ws.append([styled(block["title"], "title")])
+                ws.merged_cells.add(f"A{start_row}:{get_column_letter(total_columns)}{start_row}")
+                for row in block["rows"]:
+                    cells = [None] * max(col for col, _, _ in row)
+                    for col, value, style in row:
+                        cells[col - 1] = styled(value, style)
+                    ws.append(cells)
+                # Две пустые строки после блока
+                ws.append([])
+                ws.append([])
+            wb.save(tmp_path)
+            os.replace(tmp_path, file_path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+        self._cache["blocks"] = {period: entry for period, _, entry in layout}
+        # Блоки периодов, которых больше нет в выгрузке, не нужны
+        for name in os.listdir(self.block_dir):
+            if os.path.splitext(name)[0] not in self._cache["blocks"]:
+                os.remove(os.path.join(self.block_dir, name))
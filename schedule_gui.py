@@ -0,0 +1,2022 @@
+"""Окно приложения: таблицы месяцев, автосохранение и экспорт в Excel.
+
+Запускается через schedule_app.py.
+"""
+import sys
+import time
+import os
+import json
+from array import array
+from contextlib import contextmanager
+from PyQt5.QtWidgets import (QApplication, QMainWindow, QTableView, QAbstractItemView,
+                             QTableWidget, QTableWidgetItem,
+                             QStyledItemDelegate, QStyle,
+                             QPushButton, QVBoxLayout, QWidget, QHBoxLayout, QMenu,
+                             QLabel, QMessageBox, QFileDialog, QHeaderView,
+                             QAction, QComboBox, QInputDialog, QDialog, 
+                             QVBoxLayout, QCheckBox, QScrollArea, QDialogButtonBox,
+                             QShortcut, QTimeEdit, QFormLayout, QGridLayout, QSplitter)
+from PyQt5.QtCore import (Qt, QObject, QSettings, QThread, QTimer, pyqtSignal, QTime, QDate,
+                          QAbstractTableModel, QModelIndex, QMimeData, QEvent)
+from PyQt5.QtGui import QColor, QKeySequence, QFont, QBrush, QIcon, QPainter
+from schedule_core import (MONTH_NAMES, DAY_NAMES, hours_to_hours_minutes, pack_statuses, aggregate_statuses,
+                           make_note, format_cell_block, parse_cell_block,
+                           create_schedule_manager, ScheduleExporter, ScheduleAnalytics, PeriodChangedError)
+
+
+class MonthSelectionDialog(QDialog):
+    def __init__(self, parent=None):
+        super().__init__(parent) 
+        self.setWindowTitle("Выбор месяца и года")
+        self.setModal(True)
+        self.setMinimumWidth(300)
+        
+        layout = QVBoxLayout()
+        self.setLayout(layout)
+        
+        grid_layout = QGridLayout()
+        
+        # Текущая дата для значений по умолчанию
+        current_date = QDate.currentDate()
+        
+        # Год
+        grid_layout.addWidget(QLabel("Год:"), 0, 0)
+        self.year_combo = QComboBox()
+        current_year = current_date.year()
+        for year in range(current_year - 5, current_year + 6):  # 5 лет назад - 5 лет вперед
+            self.year_combo.addItem(str(year), year)
+        self.year_combo.setCurrentText(str(current_year))
+        grid_layout.addWidget(self.year_combo, 0, 1)
+        
+        # Месяц
+        grid_layout.addWidget(QLabel("Месяц:"), 1, 0)
+        self.month_combo = QComboBox()
+        month_names = {
+            1: "Январь", 2: "Февраль", 3: "Март", 4: "Апрель",
+            5: "Май", 6: "Июнь", 7: "Июль", 8: "Август",
+            9: "Сентябрь", 10: "Октябрь", 11: "Ноябрь", 12: "Декабрь"
+        }
+        for month_num, month_name in month_names.items():
+            self.month_combo.addItem(month_name, month_num)
+        self.month_combo.setCurrentIndex(current_date.month() - 1)
+        grid_layout.addWidget(self.month_combo, 1, 1)
+        
+        layout.addLayout(grid_layout)
+        
+        button_box = QDialogButtonBox(QDialogButtonBox.Ok | QDialogButtonBox.Cancel)
+        button_box.accepted.connect(self.accept)
+        button_box.rejected.connect(self.reject)
+        layout.addWidget(button_box)
+    
+    def get_selected_period(self):
+        year = self.year_combo.currentData()
+        month = self.month_combo.currentData()
+        return f"{year}-{month:02d}"
+
+
+class NoteDialog(QDialog):
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("Примечание к рабочему дню")
+        self.setModal(True)
+        self.setMinimumWidth(300)
+        
+        layout = QVBoxLayout()
+        self.setLayout(layout)
+        
+        form_layout = QFormLayout()
+        
+        self.end_time_edit = QTimeEdit()
+        self.end_time_edit.setTime(QTime(20, 0))
+        self.end_time_edit.setDisplayFormat("HH:mm")
+        
+        form_layout.addRow("Время окончания:", self.end_time_edit)
+        
+        layout.addLayout(form_layout)
+        
+        button_box = QDialogButtonBox(QDialogButtonBox.Ok | QDialogButtonBox.Cancel)
+        button_box.accepted.connect(self.accept)
+        button_box.rejected.connect(self.reject)
+        layout.addWidget(button_box)
+    
+    def get_end_time(self):
+        return self.end_time_edit.time().toString("HH:mm")
+
+
+class ScheduleModel(QAbstractTableModel):
+    """Модель таблицы месяца: статусы в одном массиве байтов и разреженные примечания.
+
+    Статусы хранятся для всех дней месяца (включая скрытые воскресенья), строка за
+    строкой; столбцы модели - рабочие дни и столбцы подсчета из справочника статусов.
+    """
+    # Код статуса ячейки дня для делегата
+    STATUS_ROLE = Qt.UserRole + 1
+
+    def __init__(self, statuses, calendar, parent=None):
+        super().__init__(parent)
+        self.status_registry = statuses
+        self.calendar = calendar
+        self.counter_titles = statuses.total_titles
+        self.counter_keys = statuses.total_keys
+        self.status_brushes = {code: QBrush(QColor(f"#{color}")) for code, color in statuses.colors.items()}
+        self.empty_brush = QBrush(QColor(Qt.white))
+        self.counter_font = QFont("Arial", 11, QFont.Bold)
+        self.hours_font = QFont("Arial", 10, QFont.Bold)
+        self.clear()
+
+    def clear(self):
+        self.beginResetModel()
+        self.year = self.month = None
+        self.row_ids = []
+        self.names = []
+        self.day_mapping = []
+        self.day_titles = []
+        self.days_in_month = 0
+        self.statuses = bytearray()
+        self.notes = {}  # (строка, индекс дня) -> примечание
+        self.row_totals = []
+        self.working_counts = []
+        self.endResetModel()
+
+    def load(self, period, schedule_data, names):
+        """Заполняет модель данными периода"""
+        self.beginResetModel()
+        try:
+            self.year, self.month = map(int, period.split('-'))
+            self.days_in_month, self.day_mapping, day_names = self.calendar.month(self.year, self.month)
+        except:
+            self.year = self.month = None
+            self.days_in_month = 31
+            self.day_mapping = list(range(1, self.days_in_month + 1))
+
+        # Подписи дней считаются один раз; в заголовке меняется только число работающих
+        if self.year is None:
+            self.day_titles = [str(actual_day) for actual_day in self.day_mapping]
+        else:
+            self.day_titles = [f"{actual_day}\n{day_name}\n" for actual_day, day_name in zip(self.day_mapping, day_names)]
+
+        days = self.days_in_month
+        self.row_ids = list(schedule_data.get("employees", []))
+        self.names = list(names)
+        empty = self.status_registry.empty
+        schedule = schedule_data['schedule']
+        self.statuses = pack_statuses([schedule.get(emp_id, [empty] * days) for emp_id in self.row_ids], days, empty)
+        self.notes = {}
+        notes_data = schedule_data.get('notes', {})
+        for row, emp_id in enumerate(self.row_ids):
+            for day_key, note in notes_data.get(emp_id, {}).items():
+                self.notes[(row, int(day_key))] = dict(note)
+        self.recount()
+        self.endResetModel()
+
+    @property
+    def day_count(self):
+        return len(self.day_mapping)
+
+    def day_index(self, col):
+        """Индекс дня месяца для столбца таблицы"""
+        return self.day_mapping[col] - 1
+
+    def status(self, row, col):
+        return self.statuses[row * self.days_in_month + self.day_index(col)]
+
+    def note(self, row, col):
+        return self.notes.get((row, self.day_index(col)))
+
+    def apply_changes(self, changes):
+        """Применяет изменения ячеек {(строка, столбец): (статус, примечание)}.
+
+        Счетчики строк и дней обновляются на разницу старого и нового значения
+        ячейки, перерисовываются только затронутые строки и заголовки дней.
+        Возвращает [(строка, индекс дня, (старый статус, примечание), (новый статус, примечание))].
+        """
+        days = self.days_in_month
+        diff = []
+        first_cols = {}  # строка -> первый измененный столбец
+        changed_days = []
+        for (row, col), (status, note) in changes.items():
+            if row >= len(self.row_ids) or col >= self.day_count:
+                continue
+            day_index = self.day_index(col)
+            offset = row * days + day_index
+            old = (self.statuses[offset], self.notes.get((row, day_index)))
+            if old == (status, note):
+                continue
+            if self._add_to_counters(row, col, *old, -1) | self._add_to_counters(row, col, status, note, 1):
+                changed_days.append(col)
+            self.statuses[offset] = status
+            if note is None:
+                self.notes.pop((row, day_index), None)
+            else:
+                self.notes[(row, day_index)] = dict(note)
+            diff.append((row, day_index, old, (status, note)))
+            first_cols[row] = min(col, first_cols.get(row, col))
+
+        last_col = self.columnCount() - 1
+        for row, first_col in first_cols.items():
+            self.dataChanged.emit(self.index(row, first_col), self.index(row, last_col))
+        if changed_days:
+            self.headerDataChanged.emit(Qt.Horizontal, min(changed_days), max(changed_days))
+        return diff
+
+    def _add_to_counters(self, row, col, status, note, sign):
+        """Прибавляет (sign=1) или вычитает (sign=-1) вклад ячейки в счетчики.
+
+        Возвращает True, если ячейка входит в число работающих за день.
+        """
+        if not self.status_registry.add_to_totals(self.row_totals[row], status, note, sign):
+            return False
+        self.working_counts[col] += sign
+        return True
+
+    def row_snapshot(self, row):
+        """Статусы всех дней строки и ее примечания в формате файла периода"""
+        days = self.days_in_month
+        schedule = list(self.statuses[row * days:(row + 1) * days])
+        notes = {str(day_index): dict(note) for (note_row, day_index), note in self.notes.items()
+                 if note_row == row}
+        return schedule, notes
+
+    def set_names(self, names):
+        self.names = list(names)
+        if self.names:
+            self.headerDataChanged.emit(Qt.Vertical, 0, len(self.names) - 1)
+
+    def recount(self):
+        """Полный пересчет итогов по строкам и числа работающих по дням (при загрузке)"""
+        self.row_totals, self.working_counts = aggregate_statuses(
+            self.statuses, len(self.row_ids), self.days_in_month, self.day_mapping, self.notes, self.status_registry)
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.row_ids)
+
+    def columnCount(self, parent=QModelIndex()):
+        if parent.isValid() or not self.row_ids:
+            return 0
+        return self.day_count + len(self.counter_titles)
+
+    def flags(self, index):
+        return Qt.ItemIsEnabled | Qt.ItemIsSelectable
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        row, col = index.row(), index.column()
+
+        if col < self.day_count:
+            if role == Qt.DisplayRole:
+                note = self.note(row, col)
+                return note.get('end_time', '20:00') if note is not None else ""
+            if role == self.STATUS_ROLE:
+                return self.status(row, col)
+            if role == Qt.BackgroundRole:
+                return self.status_brushes.get(self.status(row, col), self.empty_brush)
+            if role == Qt.UserRole:
+                return self.note(row, col) is not None
+            if role == Qt.ToolTipRole:
+                note = self.note(row, col)
+                if note is not None:
+                    hours = self.status_registry.shift_hours.get(self.status(row, col), 12)
+                    return f"Отработано: {note.get('worked_hours', hours)} часов"
+                return None
+        else:
+            key = self.counter_keys[col - self.day_count]
+            if role == Qt.DisplayRole:
+                totals = self.row_totals[row]
+                if key == "hours":
+                    # Форматируем часы в одну строку
+                    hours, minutes = hours_to_hours_minutes(totals["hours"])
+                    return f"{hours}ч {minutes}м"
+                return str(totals[key])
+            if role == Qt.FontRole:
+                return self.hours_font if key == "hours" else self.counter_font
+
+        if role == Qt.TextAlignmentRole:
+            return Qt.AlignCenter
+        if role == Qt.ForegroundRole:
+            return QBrush(Qt.black)
+        return None
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role != Qt.DisplayRole:
+            return None
+        if orientation == Qt.Vertical:
+            return self.names[section] if section < len(self.names) else None
+        if section >= self.day_count:
+            return self.counter_titles[section - self.day_count]
+        if self.year is None:
+            return self.day_titles[section]
+        return f"{self.day_titles[section]}({self.working_counts[section]})"
+
+
+class StatusDelegate(QStyledItemDelegate):
+    """Рисует ячейки дней: цвет статуса, время окончания и красная метка примечания.
+
+    Представление вызывает делегат только для видимых ячеек, поэтому стоимость
+    перерисовки зависит от размера окна, а не от числа сотрудников. Кисти
+    статусов берутся из модели, метка и подсветка выделения кэшируются здесь.
+    """
+    NOTE_DOT_SIZE = 6
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.note_brush = QBrush(QColor(255, 0, 0))
+        self._highlight_rgba = None
+        self._highlight_brush = None
+
+    def highlight_brush(self, palette):
+        """Полупрозрачная кисть выделения (пересоздается только при смене палитры)"""
+        color = palette.highlight().color()
+        if color.rgba() != self._highlight_rgba:
+            highlight = QColor(color)
+            highlight.setAlpha(110)
+            self._highlight_rgba = color.rgba()
+            self._highlight_brush = QBrush(highlight)
+        return self._highlight_brush
+
+    def paint(self, painter, option, index):
+        model = index.model()
+        row, col = index.row(), index.column()
+        if col >= model.day_count:
+            super().paint(painter, option, index)
+            return
+
+        rect = option.rect
+        painter.save()
+        painter.fillRect(rect, model.status_brushes.get(model.status(row, col), model.empty_brush))
+        if option.state & QStyle.State_Selected:
+            painter.fillRect(rect, self.highlight_brush(option.palette))
+        if model.note(row, col) is not None:
+            painter.setPen(Qt.black)
+            painter.drawText(rect, Qt.AlignCenter, model.data(index, Qt.DisplayRole))
+            # Красная пометка примечания в правом верхнем углу
+            size = self.NOTE_DOT_SIZE
+            painter.setRenderHint(QPainter.Antialiasing)
+            painter.setPen(Qt.NoPen)
+            painter.setBrush(self.note_brush)
+            painter.drawEllipse(rect.right() - size - 2, rect.top() + 2, size, size)
+        painter.restore()
+
+
+class SaveThread(QThread):
+    finished = pyqtSignal(bool, str)
+    
+    def __init__(self, db, period, data, changed_rows=None):
+        super().__init__()
+        self.db = db
+        self.period = period
+        self.data = data
+        self.changed_rows = changed_rows
+        self.conflict = False  # период изменен другой программой, запись отклонена
+    
+    def run(self):
+        try:
+            if self.db.save_schedule(self.period, self.data, self.changed_rows):
+                self.finished.emit(True, self.period)
+            else:
+                self.finished.emit(False, f"Не удалось сохранить {self.period}")
+        except PeriodChangedError as e:
+            self.conflict = True
+            self.finished.emit(False, str(e))
+        except Exception as e:
+            self.finished.emit(False, str(e))
+
+
+class ExportThread(QThread):
+    finished = pyqtSignal(bool, str)
+    
+    def __init__(self, exporter, file_path):
+        super().__init__()
+        self.exporter = exporter
+        self.file_path = file_path
+        self.written = False
+    
+    def run(self):
+        try:
+            self.written = self.exporter.export(self.file_path)
+            self.finished.emit(True, self.file_path)
+        except Exception as e:
+            self.finished.emit(False, str(e))
+
+
+class EmployeeSelectionDialog(QDialog):
+    def __init__(self, employees, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("Выбор сотрудников")
+        self.setModal(True)
+        self.setMinimumWidth(350)
+        
+        layout = QVBoxLayout()
+        self.setLayout(layout)
+        
+        if not employees:
+            layout.addWidget(QLabel("Нет доступных сотрудников"))
+            button_box = QDialogButtonBox(QDialogButtonBox.Ok)
+            button_box.accepted.connect(self.reject)
+            layout.addWidget(button_box)
+            return
+        
+        scroll = QScrollArea()
+        scroll.setWidgetResizable(True)
+        self.content = QWidget()
+        self.scroll_layout = QVBoxLayout(self.content)
+        
+        self.checkboxes = []
+        for emp in employees:
+            cb = QCheckBox(emp["name"])
+            cb.setChecked(True)
+            self.checkboxes.append((emp["id"], cb))
+            self.scroll_layout.addWidget(cb)
+        
+        scroll.setWidget(self.content)
+        layout.addWidget(scroll)
+        
+        btn_layout = QHBoxLayout()
+        self.select_all_btn = QPushButton("Выбрать все")
+        self.select_all_btn.clicked.connect(lambda: self.set_all_checkboxes(True))
+        btn_layout.addWidget(self.select_all_btn)
+        
+        self.deselect_all_btn = QPushButton("Снять все")
+        self.deselect_all_btn.clicked.connect(lambda: self.set_all_checkboxes(False))
+        btn_layout.addWidget(self.deselect_all_btn)
+        
+        layout.addLayout(btn_layout)
+        
+        button_box = QDialogButtonBox(QDialogButtonBox.Ok | QDialogButtonBox.Cancel)
+        button_box.accepted.connect(self.accept)
+        button_box.rejected.connect(self.reject)
+        layout.addWidget(button_box)
+    
+    def set_all_checkboxes(self, state):
+        for _, cb in self.checkboxes:
+            cb.setChecked(state)
+    
+    def get_selected_employees(self):
+        return [emp_id for emp_id, cb in self.checkboxes if cb.isChecked()]
+
+
+class AddEmployeeToPeriodDialog(QDialog):
+    def __init__(self, all_employees, current_employees, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("Добавить сотрудников в месяц")
+        self.setModal(True)
+        self.setMinimumWidth(350)
+        
+        layout = QVBoxLayout()
+        self.setLayout(layout)
+        
+        # Фильтруем сотрудников: только те, кого еще нет в текущем периоде (по id)
+        current_employee_ids = set(current_employees)
+        available_employees = [emp for emp in all_employees if emp["id"] not in current_employee_ids]
+        
+        if not available_employees:
+            layout.addWidget(QLabel("Нет доступных сотрудников для добавления"))
+            button_box = QDialogButtonBox(QDialogButtonBox.Ok)
+            button_box.accepted.connect(self.reject)
+            layout.addWidget(button_box)
+            return
+        
+        scroll = QScrollArea()
+        scroll.setWidgetResizable(True)
+        self.content = QWidget()
+        self.scroll_layout = QVBoxLayout(self.content)
+        
+        self.checkboxes = []
+        for emp in available_employees:
+            cb = QCheckBox(emp["name"])
+            cb.setChecked(True)
+            self.checkboxes.append((emp["id"], cb))
+            self.scroll_layout.addWidget(cb)
+        
+        scroll.setWidget(self.content)
+        layout.addWidget(scroll)
+        
+        btn_layout = QHBoxLayout()
+        self.select_all_btn = QPushButton("Выбрать все")
+        self.select_all_btn.clicked.connect(lambda: self.set_all_checkboxes(True))
+        btn_layout.addWidget(self.select_all_btn)
+        
+        self.deselect_all_btn = QPushButton("Снять все")
+        self.deselect_all_btn.clicked.connect(lambda: self.set_all_checkboxes(False))
+        btn_layout.addWidget(self.deselect_all_btn)
+        
+        layout.addLayout(btn_layout)
+        
+        button_box = QDialogButtonBox(QDialogButtonBox.Ok | QDialogButtonBox.Cancel)
+        button_box.accepted.connect(self.accept)
+        button_box.rejected.connect(self.reject)
+        layout.addWidget(button_box)
+    
+    def set_all_checkboxes(self, state):
+        for _, cb in self.checkboxes:
+            cb.setChecked(state)
+    
+    def get_selected_employees(self):
+        return [emp_id for emp_id, cb in self.checkboxes if cb.isChecked()]
+
+
+class AnalyticsDialog(QDialog):
+    """Итоги по сотрудникам или должностям за диапазон месяцев и за последние 12 месяцев"""
+    ROLLING_MONTHS = 12
+
+    def __init__(self, db, month_names, parent=None):
+        super().__init__(parent)
+        self.db = db
+        self.analytics = ScheduleAnalytics(db)
+        self.setWindowTitle("Аналитика")
+        self.resize(900, 500)
+        
+        layout = QVBoxLayout()
+        self.setLayout(layout)
+        
+        top_layout = QHBoxLayout()
+        self.first_combo = QComboBox()
+        self.last_combo = QComboBox()
+        periods = self.analytics.periods()
+        for period in periods:
+            try:
+                year, month = map(int, period.split('-'))
+                title = f"{month_names[month]} {year}"
+            except (ValueError, KeyError):
+                title = period
+            self.first_combo.addItem(title, period)
+            self.last_combo.addItem(title, period)
+        # По умолчанию - последние 12 месяцев
+        self.first_combo.setCurrentIndex(max(0, len(periods) - self.ROLLING_MONTHS))
+        self.last_combo.setCurrentIndex(len(periods) - 1)
+        
+        self.group_combo = QComboBox()
+        self.group_combo.addItems(["По сотрудникам", "По должностям"])
+        
+        top_layout.addWidget(QLabel("С:"))
+        top_layout.addWidget(self.first_combo)
+        top_layout.addWidget(QLabel("По:"))
+        top_layout.addWidget(self.last_combo)
+        top_layout.addWidget(self.group_combo)
+        top_layout.addStretch()
+        layout.addLayout(top_layout)
+        
+        self.table = QTableWidget()
+        self.table.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        layout.addWidget(self.table)
+        
+        button_box = QDialogButtonBox(QDialogButtonBox.Close)
+        button_box.rejected.connect(self.reject)
+        layout.addWidget(button_box)
+        
+        for combo in (self.first_combo, self.last_combo, self.group_combo):
+            combo.currentIndexChanged.connect(self.refresh)
+        self.refresh()
+    
+    def refresh(self):
+        first = self.first_combo.currentData()
+        last = self.last_combo.currentData()
+        if first and last and first > last:
+            first, last = last, first
+        statuses = self.db.statuses
+        
+        totals = self.analytics.employee_totals(first, last) if last else {}
+        rolling = self.analytics.rolling_totals(last, last, self.ROLLING_MONTHS).get(last, {}) if last else {}
+        if self.group_combo.currentIndex() == 1:
+            rows = sorted(self.analytics.team_totals(employee_totals=totals).items())
+            rolling = self.analytics.team_totals(employee_totals=rolling)
+            first_title = "Должность"
+        else:
+            # Порядок сотрудников как в общем списке
+            order = {emp["id"]: index for index, emp in enumerate(self.db.employees)}
+            rows = [(emp_id, totals[emp_id]) for emp_id in sorted(totals, key=lambda emp_id: order.get(emp_id, len(order)))]
+            first_title = "Сотрудник"
+        
+        headers = ([first_title, "Месяцев"] + statuses.total_titles
+                   + [statuses.labels[code] for code in statuses.absence_codes]
+                   + [f"Смены за {self.ROLLING_MONTHS} мес.", f"Часы за {self.ROLLING_MONTHS} мес."])
+        self.table.clear()
+        self.table.setColumnCount(len(headers))
+        self.table.setHorizontalHeaderLabels(headers)
+        self.table.setRowCount(len(rows))
+        for row, (key, row_totals) in enumerate(rows):
+            name = key if first_title == "Должность" else self.db.employee_name(key)
+            window = rolling.get(key) or self.analytics.new_totals()
+            days = row_totals["status_days"]
+            values = ([name, row_totals["periods"]]
+                      + [row_totals[total_key] for total_key in statuses.total_keys[:-1]]
+                      + [self.format_hours(row_totals["hours"])]
+                      + [days.get(str(code), 0) for code in statuses.absence_codes]
+                      + [window["shifts"], self.format_hours(window["hours"])])
+            for col, value in enumerate(values):
+                item = QTableWidgetItem(str(value))
+                if col:
+                    item.setTextAlignment(Qt.AlignCenter)
+                self.table.setItem(row, col, item)
+        self.table.resizeColumnsToContents()
+    
+    def format_hours(self, total_hours):
+        hours, minutes = hours_to_hours_minutes(total_hours)
+        return f"{hours}ч {minutes}м"
+
+
+class EditHistory:
+    """История правок периода для отмены и повтора.
+
+    Шаг хранит только измененные ячейки: смещения в массиве статусов модели,
+    старые и новые коды байтами и примечания тех ячеек, где они были или
+    появились. Правки, идущие подряд с паузой меньше COALESCE_SECONDS, сливаются
+    в один шаг. Старые шаги отбрасываются, когда история превышает MAX_STEPS
+    шагов или MAX_CELLS ячеек.
+    """
+    MAX_STEPS = 200
+    MAX_CELLS = 2000000
+    COALESCE_SECONDS = 1.0
+
+    def __init__(self):
+        self.clear()
+
+    def clear(self):
+        self.undo_steps = []
+        self.redo_steps = []
+        self.cells = 0  # ячеек во всех шагах обоих стеков
+        self._last_record = None  # время последней записанной правки
+
+    def record(self, diff, days):
+        """Записывает примененные изменения [(строка, индекс дня, старое, новое)]"""
+        offsets = array('I', [row * days + day_index for row, day_index, _, _ in diff])
+        old = bytes(old_status for _, _, (old_status, _), _ in diff)
+        new = bytes(new_status for _, _, _, (new_status, _) in diff)
+        notes = {row * days + day_index: (old_note, new_note)
+                 for row, day_index, (_, old_note), (_, new_note) in diff
+                 if old_note is not None or new_note is not None}
+        step = (offsets, old, new, notes)
+
+        now = time.perf_counter()
+        coalesce = (self.undo_steps and self._last_record is not None
+                    and now - self._last_record < self.COALESCE_SECONDS)
+        self._last_record = now
+        self.cells -= sum(len(step[0]) for step in self.redo_steps)
+        self.redo_steps.clear()
+        if coalesce:
+            previous = self.undo_steps.pop()
+            self.cells -= len(previous[0])
+            step = self.merge(previous, step)
+        self.undo_steps.append(step)
+        self.cells += len(step[0])
+
+        while len(self.undo_steps) > 1 and (len(self.undo_steps) > self.MAX_STEPS or self.cells > self.MAX_CELLS):
+            self.cells -= len(self.undo_steps.pop(0)[0])
+
+    @staticmethod
+    def merge(first, second):
+        """Шаг, равный последовательному применению first и second"""
+        offsets, old, new, notes = array('I', first[0]), bytearray(first[1]), bytearray(first[2]), dict(first[3])
+        positions = {offset: i for i, offset in enumerate(offsets)}
+        second_notes = second[3]
+        for offset, old_status, new_status in zip(*second[:3]):
+            note = second_notes.get(offset)
+            i = positions.get(offset)
+            if i is None:
+                positions[offset] = len(offsets)
+                offsets.append(offset)
+                old.append(old_status)
+                new.append(new_status)
+                if note is not None:
+                    notes[offset] = note
+                continue
+            # Ячейка уже менялась: старое значение остается от первого шага
+            new[i] = new_status
+            old_note = notes[offset][0] if offset in notes else None
+            new_note = note[1] if note is not None else None
+            if old_note is None and new_note is None:
+                notes.pop(offset, None)
+            else:
+                notes[offset] = (old_note, new_note)
+        return offsets, bytes(old), bytes(new), notes
+
+    def undo(self):
+        """Снимает последний шаг; возвращает его или None"""
+        if not self.undo_steps:
+            return None
+        step = self.undo_steps.pop()
+        self.redo_steps.append(step)
+        # Правка после отмены начинает новый шаг
+        self._last_record = None
+        return step
+
+    def redo(self):
+        """Возвращает последний отмененный шаг или None"""
+        if not self.redo_steps:
+            return None
+        step = self.redo_steps.pop()
+        self.undo_steps.append(step)
+        self._last_record = None
+        return step
+
+
+class PeriodDocument(QObject):
+    """Открытый период: модель таблицы и состояние сохранения.
+
+    Один документ на период разделяют все окна, где этот месяц открыт, поэтому
+    правка в одном окне сразу видна в остальных, а данные хранятся один раз.
+    Документ создается при первом показе периода и освобождается, когда период
+    не показан ни в одном окне.
+    """
+
+    def __init__(self, app, period):
+        super().__init__(app)
+        self.app = app
+        self.db = app.db
+        self.period = period
+        self.model = ScheduleModel(app.statuses, app.calendar, self)
+        self.row_ids = []  # id сотрудников в порядке строк таблицы
+        self.saved_data = None  # данные периода на момент последнего сохранения
+        self.dirty_rows = set()  # строки, измененные после последнего сохранения
+        self.panes = set()  # окна, показывающие период
+        self.history = EditHistory()
+        self.reload()
+
+    def reload(self):
+        """Перечитывает период из хранилища; все окна с ним обновляются через модель"""
+        self.row_ids = []
+        self.dirty_rows = set()
+        # Шаги истории ссылаются на строки прежней таблицы
+        self.history.clear()
+        schedule_data = self.db.load_schedule(self.period)
+        self.saved_data = schedule_data
+        
+        if not schedule_data or not schedule_data.get("employees"):
+            self.model.clear()
+            return
+        
+        # Строки таблицы привязаны к id сотрудников, имена - только для отображения
+        self.row_ids = list(schedule_data["employees"])
+        self.model.load(self.period, schedule_data, [self.db.employee_name(emp_id) for emp_id in self.row_ids])
+
+    def apply(self, changes, record=True):
+        """Применяет пакет изменений ячеек {(строка, столбец): (статус, примечание)}"""
+        diff = self.model.apply_changes(changes)
+        if diff:
+            if record:
+                self.history.record(diff, self.model.days_in_month)
+            self.mark_modified({row for row, _, _, _ in diff})
+        return diff
+
+    def undo(self):
+        """Отменяет последний шаг истории; возвращает число измененных ячеек"""
+        step = self.history.undo()
+        return len(self.apply(self.step_changes(step, undo=True), record=False)) if step else 0
+
+    def redo(self):
+        """Повторяет последний отмененный шаг; возвращает число измененных ячеек"""
+        step = self.history.redo()
+        return len(self.apply(self.step_changes(step, undo=False), record=False)) if step else 0
+
+    def step_changes(self, step, undo):
+        """Изменения ячеек {(строка, столбец): (статус, примечание)} для шага истории"""
+        offsets, old, new, notes = step
+        days = self.model.days_in_month
+        columns = {actual_day - 1: col for col, actual_day in enumerate(self.model.day_mapping)}
+        side = 0 if undo else 1
+        changes = {}
+        for offset, status in zip(offsets, old if undo else new):
+            row, day_index = divmod(offset, days)
+            note = notes.get(offset)
+            changes[(row, columns[day_index])] = (status, note[side] if note is not None else None)
+        return changes
+
+    def mark_modified(self, rows):
+        """Помечает строки измененными, чтобы период попал в автосохранение"""
+        if rows:
+            self.dirty_rows.update(rows)
+            self.app.mark_period_dirty(self)
+
+    def refresh_employee_names(self):
+        self.model.set_names([self.db.employee_name(emp_id) for emp_id in self.row_ids])
+
+
+class MonthWidget(QWidget):
+    """Окно месяца. Таблица строится и модель периода подключается только при
+    первом показе окна; свернутые окна держат лишь выбранный период."""
+    # Формат буфера обмена между окнами и экземплярами программы (коды и примечания);
+    # вместе с ним кладется текст с табуляциями для Excel
+    CLIPBOARD_MIME = "application/x-work-schedule"
+
+    def __init__(self, parent=None, db=None):
+        super().__init__(parent)
+        self.parent = parent
+        self.db = db
+        self.current_period = None
+        self.document = None  # общий документ периода (пока окно не показано - None)
+        self.table = None
+        self.pending_edit = None  # {(строка, столбец): (статус, примечание)} открытого пакета
+        self.edit_depth = 0
+        self.initUI()
+    
+    def initUI(self):
+        layout = QVBoxLayout()
+        self.setLayout(layout)
+        
+        # Верхняя панель с выбором месяца
+        top_layout = QHBoxLayout()
+        
+        self.period_combo = QComboBox()
+        self.period_combo.currentIndexChanged.connect(self.period_changed)
+        top_layout.addWidget(QLabel("Месяц:"))
+        top_layout.addWidget(self.period_combo)
+        
+        top_layout.addStretch()
+        
+        # Окна месяцев добавляются и закрываются в рабочей области
+        self.add_pane_btn = QPushButton("+")
+        self.add_pane_btn.setToolTip("Открыть еще один месяц")
+        self.add_pane_btn.setFixedWidth(30)
+        # Новое окно открывает тот же месяц: модель у окон общая, правки видны в обоих
+        self.add_pane_btn.clicked.connect(lambda: self.parent.add_month_pane(self.current_period))
+        top_layout.addWidget(self.add_pane_btn)
+        
+        self.close_pane_btn = QPushButton("×")
+        self.close_pane_btn.setToolTip("Закрыть окно месяца")
+        self.close_pane_btn.setFixedWidth(30)
+        self.close_pane_btn.clicked.connect(lambda: self.parent.close_month_pane(self))
+        top_layout.addWidget(self.close_pane_btn)
+        
+        layout.addLayout(top_layout)
+    
+    @property
+    def model(self):
+        return self.document.model if self.document is not None else None
+    
+    @property
+    def row_ids(self):
+        return self.document.row_ids if self.document is not None else []
+    
+    def ensure_table(self):
+        """Таблица окна: представление над моделью документа, ячейки рисует делегат"""
+        if self.table is None:
+            self.table = QTableView(self)
+            self.table.setItemDelegate(StatusDelegate(self.table))
+            self.setup_table(self.table)
+            if not self.parent._table_painted:
+                # Готовность к работе считается до первой отрисовки таблицы
+                self.table.viewport().installEventFilter(self)
+            # Копирование и вставка через системный буфер обмена
+            for key, handler in ((QKeySequence.Copy, self.copy_selected), (QKeySequence.Paste, self.paste_selected)):
+                action = QAction(self.table)
+                action.setShortcut(key)
+                action.setShortcutContext(Qt.WidgetShortcut)
+                action.triggered.connect(handler)
+                self.table.addAction(action)
+            self.layout().addWidget(self.table)
+        return self.table
+    
+    def eventFilter(self, obj, event):
+        if event.type() == QEvent.Paint and self.table is not None and obj is self.table.viewport():
+            obj.removeEventFilter(self)
+            self.parent.table_painted()
+        return super().eventFilter(obj, event)
+    
+    def showEvent(self, event):
+        super().showEvent(event)
+        self.materialize()
+    
+    def resizeEvent(self, event):
+        super().resizeEvent(event)
+        # Свернутое в сплиттере окно остается видимым, но с нулевой высотой
+        self.materialize()
+    
+    def materialize(self):
+        """Подключает выбранный период, когда окно действительно показано"""
+        if self.current_period is None or not self.isVisible() or self.height() == 0:
+            return
+        if self.document is None or self.document.period != self.current_period:
+            self.attach(self.current_period)
+    
+    def attach(self, period):
+        # Незавершенный пакет относится к прежнему периоду
+        self.rollback_edit()
+        self.detach()
+        self.document = self.parent.acquire_document(period, self)
+        table = self.ensure_table()
+        table.setModel(self.document.model)
+        self.document.model.modelReset.connect(self.apply_column_widths)
+        self.apply_column_widths()
+    
+    def detach(self):
+        """Отключает окно от документа; последний отключившийся освобождает его"""
+        if self.document is None:
+            return
+        self.rollback_edit()
+        self.document.model.modelReset.disconnect(self.apply_column_widths)
+        self.table.setModel(None)
+        document, self.document = self.document, None
+        self.parent.release_document(document, self)
+    
+    def setup_table(self, table):
+        table.setSelectionMode(QAbstractItemView.ExtendedSelection)
+        table.setContextMenuPolicy(Qt.CustomContextMenu)
+        table.customContextMenuRequested.connect(self.show_context_menu)
+        table.verticalHeader().sectionDoubleClicked.connect(self.rename_employee)
+        
+        table.horizontalHeader().setSectionResizeMode(QHeaderView.Interactive)
+        table.verticalHeader().setSectionResizeMode(QHeaderView.Fixed)
+        table.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        
+        # Установка увеличенной высоты строк
+        table.verticalHeader().setDefaultSectionSize(30)  # Увеличено с 25 до 30
+        
+        # Увеличиваем шрифт для заголовков дней
+        font = table.horizontalHeader().font()
+        font.setBold(True)
+        font.setPointSize(12)  # Увеличено с 10 до 12
+        table.horizontalHeader().setFont(font)
+        
+        # Увеличиваем шрифт для вертикальных заголовков (ФИО)
+        font = table.verticalHeader().font()
+        font.setBold(True)
+        font.setPointSize(12)  # Увеличено с 10 до 12
+        table.verticalHeader().setFont(font)
+    
+    def rename_employee(self, row):
+        """Переименование сотрудника двойным щелчком по его строке"""
+        if row >= len(self.row_ids):
+            return
+        emp_id = self.row_ids[row]
+        name, ok = QInputDialog.getText(self, "Переименовать сотрудника", "ФИО сотрудника:",
+                                        text=self.db.employee_name(emp_id))
+        name = name.strip()
+        if not ok or not name:
+            return
+        if self.db.rename_employee(emp_id, name):
+            self.parent.refresh_employee_names()
+        else:
+            QMessageBox.warning(self, "Ошибка", "Сотрудник с таким именем уже существует")
+    
+    def load_periods(self, periods=None):
+        """Заполняет список месяцев, не перезагружая открытый период"""
+        if periods is None:
+            periods = self.db.get_periods()
+        # Сигналы отключены: заполнение списка не должно загружать периоды
+        self.period_combo.blockSignals(True)
+        self.period_combo.clear()
+        
+        if periods:
+            for period in periods:
+                try:
+                    year, month = map(int, period.split('-'))
+                    month_name = f"{self.parent.month_names[month]} {year}"
+                    self.period_combo.addItem(month_name, period)
+                except:
+                    self.period_combo.addItem(period, period)
+        
+        self.period_combo.setCurrentIndex(self.period_combo.findData(self.current_period))
+        self.period_combo.blockSignals(False)
+    
+    def select_period(self, period):
+        """Выбирает период в списке и загружает его"""
+        index = self.period_combo.findData(period)
+        if index < 0:
+            return False
+        if index != self.period_combo.currentIndex():
+            self.period_combo.setCurrentIndex(index)
+        elif period != self.current_period:
+            self.period_changed(index)
+        return True
+    
+    def period_changed(self, index):
+        if index >= 0:
+            # Несохраненные правки текущего периода нужно снять до смены таблицы
+            self.parent.flush_autosave()
+            self.load_data(self.period_combo.itemData(index))
+    
+    def load_data(self, period):
+        """Показывает период; скрытое окно подключит его при первом показе"""
+        self.current_period = period
+        if self.document is not None and self.document.period != period:
+            self.detach()
+        self.materialize()
+    
+    def apply_column_widths(self):
+        working_days_count = self.model.day_count
+        
+        # СИЛЬНО УМЕНЬШЕННАЯ ШИРИНА СТОЛБЦОВ С ДНЯМИ
+        fixed_day_width = 25  # Уменьшено с 50 до 25 пикселей
+        
+        # Устанавливаем фиксированную ширину для всех столбцов с днями
+        for col in range(working_days_count):
+            self.table.setColumnWidth(col, fixed_day_width)
+        
+        # Ширина для столбцов подсчета (расширенные), часы - шире остальных
+        counter_count = len(self.model.counter_titles)
+        for offset in range(counter_count):
+            self.table.setColumnWidth(working_days_count + offset, 80 if offset == counter_count - 1 else 70)
+        
+        # Настраиваем поведение заголовков
+        # Столбцы с днями и подсчетами фиксированные
+        for col in range(working_days_count + counter_count):
+            self.table.horizontalHeader().setSectionResizeMode(col, QHeaderView.Fixed)
+
+    def show_context_menu(self, pos):
+        table = self.table
+        selected = table.selectedIndexes()
+        if not selected:
+            return
+        
+        menu = QMenu()
+        
+        copy_action = QAction("Копировать", self)
+        copy_action.triggered.connect(self.copy_selected)
+        menu.addAction(copy_action)
+        
+        paste_action = QAction("Вставить", self)
+        paste_action.triggered.connect(self.paste_selected)
+        menu.addAction(paste_action)
+        
+        menu.addSeparator()
+        
+        undo_action = QAction("Отменить", self)
+        undo_action.setEnabled(bool(self.document.history.undo_steps))
+        undo_action.triggered.connect(self.parent.undo_edit)
+        menu.addAction(undo_action)
+        
+        redo_action = QAction("Повторить", self)
+        redo_action.setEnabled(bool(self.document.history.redo_steps))
+        redo_action.triggered.connect(self.parent.redo_edit)
+        menu.addAction(redo_action)
+        
+        menu.addSeparator()
+        
+        if len(selected) == 1:
+            index = selected[0]
+            if index.column() < self.model.day_count:  # Исключаем столбцы подсчета
+                # Только для колл-центра и регистратуры
+                if self.model.status(index.row(), index.column()) in self.parent.statuses.shift_hours:
+                    if self.model.note(index.row(), index.column()) is not None:
+                        remove_note_action = QAction("Удалить примечание", self)
+                        remove_note_action.triggered.connect(lambda: self.remove_note(index))
+                        menu.addAction(remove_note_action)
+                        menu.addSeparator()
+                    
+                    note_action = QAction("Примечание", self)
+                    note_action.triggered.connect(lambda: self.add_note(index))
+                    menu.addAction(note_action)
+                    menu.addSeparator()
+        
+        for status in self.parent.statuses:
+            action = QAction(f"■ {status['label']}", self)  # Используем квадратик вместо иконки
+            action.triggered.connect(lambda _, s=status["code"]: self.update_selected_status(s))
+            menu.addAction(action)
+        
+        menu.exec_(table.viewport().mapToGlobal(pos))
+    
+    def begin_edit(self):
+        """Открывает пакет правок; вложенные пакеты сливаются во внешний"""
+        if self.edit_depth == 0:
+            self.pending_edit = {}
+        self.edit_depth += 1
+    
+    def commit_edit(self):
+        """Применяет пакет: счетчики, перерисовка и автосохранение - один раз на пакет.
+        
+        Возвращает список изменений пакета (пустой, если пакет вложенный или ничего не изменилось).
+        """
+        if self.edit_depth == 0:
+            return []
+        self.edit_depth -= 1
+        if self.edit_depth > 0:
+            return []
+        changes, self.pending_edit = self.pending_edit, None
+        if self.document is None or not changes:
+            return []
+        return self.document.apply(changes)
+    
+    def rollback_edit(self):
+        """Отменяет открытый пакет целиком, включая внешние уровни"""
+        self.pending_edit = None
+        self.edit_depth = 0
+    
+    @contextmanager
+    def edit(self):
+        """Пакет правок: with widget.edit(): widget.stage_status(...)"""
+        self.begin_edit()
+        try:
+            yield self
+        except Exception:
+            self.rollback_edit()
+            raise
+        self.commit_edit()
+    
+    def staged_cell(self, row, col):
+        """Статус и примечание ячейки с учетом еще не примененных правок пакета"""
+        key = (row, col)
+        if self.pending_edit is not None and key in self.pending_edit:
+            return self.pending_edit[key]
+        return self.model.status(row, col), self.model.note(row, col)
+    
+    def stage_status(self, row, col, status):
+        """Меняет статус ячейки в пакете; примечание ячейки сохраняется"""
+        if row >= len(self.row_ids) or col >= self.model.day_count:
+            return
+        with self.edit():
+            self.pending_edit[(row, col)] = (status, self.staged_cell(row, col)[1])
+    
+    def stage_note(self, row, col, note):
+        """Устанавливает или (note=None) удаляет примечание ячейки в пакете"""
+        if row >= len(self.row_ids) or col >= self.model.day_count:
+            return
+        with self.edit():
+            self.pending_edit[(row, col)] = (self.staged_cell(row, col)[0], note)
+    
+    def add_note(self, index):
+        # Только для колл-центра и регистратуры
+        if self.model.status(index.row(), index.column()) not in self.parent.statuses.shift_hours:
+            return
+        
+        dialog = NoteDialog(self)
+        if dialog.exec_() == QDialog.Accepted:
+            self.stage_note(index.row(), index.column(), make_note(dialog.get_end_time()))
+    
+    def remove_note(self, index):
+        if self.model.note(index.row(), index.column()) is not None:
+            self.stage_note(index.row(), index.column(), None)
+    
+    def selected_day_cells(self):
+        """Выделенные ячейки дней [(строка, столбец)]; столбцы подсчета не входят"""
+        if self.table is None or self.document is None:
+            return []
+        day_count = self.model.day_count
+        return [(index.row(), index.column()) for index in self.table.selectedIndexes()
+                if index.column() < day_count]
+    
+    def copy_selected(self):
+        """Копирует прямоугольник выделенных дней в системный буфер обмена"""
+        cells = self.selected_day_cells()
+        if not cells:
+            return
+        rows = [row for row, _ in cells]
+        cols = [col for _, col in cells]
+        top, left = min(rows), min(cols)
+        block = [[(self.model.status(row, col), self.model.note(row, col)) for col in range(left, max(cols) + 1)]
+                 for row in range(top, max(rows) + 1)]
+        
+        payload = {
+            "statuses": [[status for status, _ in line] for line in block],
+            # Примечаний мало: только ячейки, где они есть, с позицией в блоке
+            "notes": [[r, c, note] for r, line in enumerate(block) for c, (_, note) in enumerate(line)
+                      if note is not None]
+        }
+        mime = QMimeData()
+        mime.setData(self.CLIPBOARD_MIME, json.dumps(payload, ensure_ascii=False, separators=(',', ':')).encode('utf-8'))
+        mime.setText(format_cell_block(block, self.model.status_registry))
+        QApplication.clipboard().setMimeData(mime)
+    
+    def clipboard_block(self):
+        """Блок [[(статус, примечание) или None]] из буфера обмена; None - данных нет"""
+        registry = self.model.status_registry
+        mime = QApplication.clipboard().mimeData()
+        if mime is None:
+            return None
+        if mime.hasFormat(self.CLIPBOARD_MIME):
+            try:
+                payload = json.loads(bytes(mime.data(self.CLIPBOARD_MIME)).decode('utf-8'))
+                block = [[(status, None) if status in registry else None for status in line]
+                         for line in payload["statuses"]]
+                for r, c, note in payload["notes"]:
+                    if block[r][c] is not None:
+                        block[r][c] = (block[r][c][0], note)
+                return block
+            except (ValueError, KeyError, IndexError, TypeError):
+                pass
+        if mime.hasText():
+            return parse_cell_block(mime.text(), registry)
+        return None
+    
+    def paste_selected(self):
+        """Вставляет блок из буфера обмена одним пакетом от левого верхнего выделенного дня.
+        
+        Одна скопированная ячейка заполняет все выделение.
+        """
+        cells = self.selected_day_cells()
+        if not cells:
+            return
+        block = self.clipboard_block()
+        if not block:
+            return
+        
+        if len(block) == 1 and len(block[0]) == 1:
+            targets = [(row, col, block[0][0]) for row, col in cells]
+        else:
+            top = min(row for row, _ in cells)
+            left = min(col for _, col in cells)
+            # Часть блока за краем таблицы отбрасывается
+            row_count = min(len(block), len(self.row_ids) - top)
+            col_count = self.model.day_count - left
+            targets = [(top + r, left + c, cell) for r, line in enumerate(block[:row_count])
+                       for c, cell in enumerate(line[:col_count])]
+        
+        unknown = 0
+        with self.edit():
+            for row, col, cell in targets:
+                if cell is None:
+                    unknown += 1
+                else:
+                    self.pending_edit[(row, col)] = cell
+        if unknown:
+            self.parent.statusBar().showMessage(f"Не распознано ячеек: {unknown}, они не изменены", 5000)
+    
+    def update_selected_status(self, status):
+        if self.table is None or self.document is None:
+            return
+        selected = self.table.selectedIndexes()
+        if not selected:
+            return
+        
+        with self.edit():
+            for index in selected:
+                self.stage_status(index.row(), index.column(), status)
+
+
+class ScheduleApp(QMainWindow):
+    # Пауза после последней правки перед фоновым сохранением
+    AUTOSAVE_DELAY_MS = 1500
+    # Бюджет времени от запуска до готовности к работе (переопределяется в настройках)
+    STARTUP_BUDGET_MS = 1500
+
+    def __init__(self):
+        super().__init__()
+        self.settings = QSettings("MyCompany", "WorkSchedule")
+        self.db = create_schedule_manager(self.settings.value("storage_format", "json"))
+        self.export_folder = self.settings.value("export_folder", "")
+        
+        # Справочник статусов (statuses.json рядом с данными) общий для таблиц и экспорта
+        self.statuses = self.db.statuses
+        
+        self.month_names = MONTH_NAMES
+        self.day_names = DAY_NAMES
+        # Производственный календарь (calendar.json рядом с данными), общий для таблиц и экспорта
+        self.calendar = self.db.calendar
+        
+        # Экспорт идет из фонового потока Qt: fork многопоточного процесса небезопасен
+        self.exporter = ScheduleExporter(self.db, start_method="spawn")
+        
+        # Открытые периоды: период -> PeriodDocument, общий для всех окон с этим месяцем
+        self.documents = {}
+        self.month_widgets = []
+        
+        # Автосохранение: правки помечают период, таймер объединяет серии правок,
+        # запись идет в SaveThread - не более одной одновременно на период
+        self._dirty_periods = {}  # период -> документ с последней правкой
+        self._save_threads = {}  # период -> выполняющийся SaveThread
+        self._queued_saves = {}  # период -> снимок, ожидающий окончания текущей записи
+        self.autosave_timer = QTimer(self)
+        self.autosave_timer.setSingleShot(True)
+        self.autosave_timer.setInterval(self.AUTOSAVE_DELAY_MS)
+        self.autosave_timer.timeout.connect(self.flush_autosave)
+        
+        # Экспорт в Excel идет в ExportThread, повторный запрос ждет окончания текущего
+        self._export_thread = None
+        self._export_pending = False
+        
+        self.initUI()
+        self.init_shortcuts()
+        self.load_initial_data()
+    
+    def initUI(self):
+        self.setWindowTitle("Рабочее расписание")
+        self.setGeometry(100, 100, 1600, 800)
+        self.setWindowIcon(QIcon('schedule.ico'))
+        
+        self.central_widget = QWidget()
+        self.setCentralWidget(self.central_widget)
+        self.layout = QVBoxLayout()
+        self.central_widget.setLayout(self.layout)
+        
+        # Верхняя панель с кнопками
+        self.buttons_layout = QHBoxLayout()
+        
+        # Левая часть панели - основные кнопки
+        left_buttons_layout = QHBoxLayout()
+        
+        # Кнопка Новый месяц
+        self.new_month_btn = QPushButton("Новый месяц")
+        self.new_month_btn.clicked.connect(self.select_month_and_year)
+        self.new_month_btn.setFixedHeight(40)  # высота
+        self.new_month_btn.setFixedWidth(120)  # ширина
+        self.new_month_btn.setStyleSheet("""
+            QPushButton {
+                background: #06B6D4;
+                color: #FFFFFF;
+                border: none;
+                border-radius: 6px;
+                font-size: 14px;
+                font-weight: 400;
+            }
+            QPushButton:hover {
+                background: #0891B2;
+            }
+            QPushButton:pressed {
+                background-color: #0E7490;
+            }
+        """)
+        left_buttons_layout.addWidget(self.new_month_btn)
+        
+        # Кнопка Новый сотрудник
+        self.add_employee_btn = QPushButton("Новый сотрудник")
+        self.add_employee_btn.clicked.connect(self.add_employee_dialog)
+        self.add_employee_btn.setFixedHeight(30)  # высота
+        self.add_employee_btn.setFixedWidth(140)  # ширина
+        self.add_employee_btn.setStyleSheet("""
+            QPushButton {
+                background-color: #808080;
+                color: white;
+                border: none;
+                border-radius: 6px;
+                font-size: 14px;
+                font-weight: 400;
+            }
+            QPushButton:hover {
+                background-color: #696969;
+            }
+            QPushButton:pressed {
+                background-color: #505050;
+            }
+        """)
+        left_buttons_layout.addWidget(self.add_employee_btn)
+        
+        # Кнопка для добавления сотрудников в текущий период
+        self.add_to_period_btn = QPushButton("Добавить в месяц")
+        self.add_to_period_btn.clicked.connect(self.add_employees_to_period)
+        self.add_to_period_btn.setFixedHeight(30)  # высота
+        self.add_to_period_btn.setFixedWidth(140)  # ширина
+        self.add_to_period_btn.setStyleSheet("""
+            QPushButton {
+                background-color: #808080;
+                color: white;
+                border: none;
+                border-radius: 6px;
+                font-size: 14px;
+                font-weight: 400;
+            }
+            QPushButton:hover {
+                background-color: #696969;
+            }
+            QPushButton:pressed {
+                background-color: #505050;
+            }
+        """)
+        left_buttons_layout.addWidget(self.add_to_period_btn)
+        
+        # Кнопка Аналитика - итоги за несколько месяцев
+        self.analytics_btn = QPushButton("Аналитика")
+        self.analytics_btn.clicked.connect(self.show_analytics)
+        self.analytics_btn.setFixedHeight(30)  # высота
+        self.analytics_btn.setFixedWidth(120)  # ширина
+        self.analytics_btn.setStyleSheet("""
+            QPushButton {
+                background-color: #808080;
+                color: white;
+                border: none;
+                border-radius: 6px;
+                font-size: 14px;
+                font-weight: 400;
+            }
+            QPushButton:hover {
+                background-color: #696969;
+            }
+            QPushButton:pressed {
+                background-color: #505050;
+            }
+        """)
+        left_buttons_layout.addWidget(self.analytics_btn)
+        
+        # Правая часть панели - кнопка Сохранить и другие
+        right_buttons_layout = QHBoxLayout()
+        
+        # Кнопка Открыть документ
+        self.open_doc_btn = QPushButton("Открыть документ")
+        self.open_doc_btn.clicked.connect(self.open_document)
+        self.open_doc_btn.setFixedHeight(30)  # высота
+        self.open_doc_btn.setFixedWidth(140)  # ширина
+        self.open_doc_btn.setStyleSheet("""
+            QPushButton {
+                background-color: #808080;
+                color: white;
+                border: none;
+                border-radius: 6px;
+                font-size: 14px;
+                font-weight: 400;
+            }
+            QPushButton:hover {
+                background-color: #696969;
+            }
+            QPushButton:pressed {
+                background-color: #505050;
+            }
+        """)
+        right_buttons_layout.addWidget(self.open_doc_btn)
+        
+        # Кнопка Выбрать папку
+        self.select_folder_btn = QPushButton("Выбрать папку")
+        self.select_folder_btn.clicked.connect(self.select_export_folder)
+        self.select_folder_btn.setFixedHeight(30)  # высота
+        self.select_folder_btn.setFixedWidth(120)  # ширина
+        self.select_folder_btn.setStyleSheet("""
+            QPushButton {
+                background-color: #808080;
+                color: white;
+                border: none;
+                border-radius: 6px;
+                font-size: 14px;
+                font-weight: 400;
+            }
+            QPushButton:hover {
+                background-color: #696969;
+            }
+            QPushButton:pressed {
+                background-color: #505050;
+            }
+        """)
+        right_buttons_layout.addWidget(self.select_folder_btn)
+        
+        # Кнопка Сохранить - большая, зеленая, в правом углу
+        self.save_btn = QPushButton("СОХРАНИТЬ")
+        self.save_btn.clicked.connect(self.save_data)
+        self.save_btn.setFixedHeight(40)  # высота
+        self.save_btn.setFixedWidth(120)  # ширина
+        self.save_btn.setStyleSheet("""
+            QPushButton {
+                background: #28A745;
+                color: #FFFFFF;
+                border: none;
+                border-radius: 6px;
+                font-size: 14px;
+                font-weight: 400;
+            }
+            QPushButton:hover {
+                background-color: #218838;
+            }
+            QPushButton:pressed {
+                background-color: #1E7E34;
+            }
+        """)
+        right_buttons_layout.addWidget(self.save_btn)
+        
+        # Объединяем левую и правую части
+        self.buttons_layout.addLayout(left_buttons_layout)
+        self.buttons_layout.addStretch()  # Растягивающийся элемент между левой и правой частями
+        self.buttons_layout.addLayout(right_buttons_layout)
+        
+        self.layout.addLayout(self.buttons_layout)
+        
+        # Создаем сплиттер для вертикального расположения месяцев;
+        # окна месяцев добавляются при загрузке рабочей области
+        self.splitter = QSplitter(Qt.Vertical)
+        self.layout.addWidget(self.splitter)
+        
+        self.legend_layout = QHBoxLayout()
+        for status in self.statuses:
+            legend_item = QHBoxLayout()
+            # Убраны иконки из легенды, оставлены только цвета
+            color_label = QLabel("■")
+            color_label.setStyleSheet(f"font-size: 16px; color: #{status['color']}; padding: 2px;")
+            legend_item.addWidget(color_label)
+            
+            text_label = QLabel(status["label"])
+            text_label.setStyleSheet("padding: 2px; font-size: 11px;")  # Увеличен шрифт легенды
+            legend_item.addWidget(text_label)
+            legend_item.addSpacing(20)
+            self.legend_layout.addLayout(legend_item)
+        
+        self.legend_layout.addStretch()
+        self.layout.addLayout(self.legend_layout)
+        
+        self.statusBar().showMessage("Готово")
+    
+    def init_shortcuts(self):
+        for status in self.statuses:
+            if status["shortcut"]:
+                shortcut = QShortcut(QKeySequence(status["shortcut"]), self)
+                shortcut.activated.connect(lambda s=status["code"]: self.update_selected_status(s))
+        
+        # Отмена и повтор правок активного месяца
+        QShortcut(QKeySequence("Ctrl+Z"), self).activated.connect(self.undo_edit)
+        for key in ("Ctrl+Y", "Ctrl+Shift+Z"):
+            QShortcut(QKeySequence(key), self).activated.connect(self.redo_edit)
+    
+    def load_initial_data(self):
+        """Заполняет списки месяцев; сами периоды загружаются после первой отрисовки окна"""
+        periods = self.db.get_periods()
+        
+        # Открываем месяцы прошлого сеанса, иначе самый старый и самый новый
+        saved = self.settings.value("workspace/periods", [], type=list)
+        if not saved:
+            saved = [self.settings.value(key) for key in ("last_period_1", "last_period_2")]
+        defaults = [periods[0], periods[-1]] if periods else []
+        opened = [period for period in saved if period in periods] or defaults
+        
+        for _ in range(max(len(opened), 2)):
+            self.add_month_pane(periods=periods)
+        
+        self._pending_periods = list(zip(self.month_widgets, opened))
+        self._first_paint_ms = None  # первая отрисовка окна
+        self._table_painted = False  # первая отрисовка таблицы месяца
+        self._startup_waiting = False  # периоды загружены, ждем отрисовки таблицы
+        # Загрузка периодов начинается после первой отрисовки окна, чтобы не задерживать ее
+        self.installEventFilter(self)
+    
+    def eventFilter(self, obj, event):
+        if obj is self and event.type() == QEvent.Paint and self._first_paint_ms is None:
+            self.removeEventFilter(self)
+            self._first_paint_ms = (time.perf_counter() - STARTUP_STARTED) * 1000
+            QTimer.singleShot(0, self.load_pending_period)
+        return super().eventFilter(obj, event)
+    
+    def load_pending_period(self):
+        """Загружает по одному отложенному периоду за проход цикла событий"""
+        if self._pending_periods:
+            widget, period = self._pending_periods.pop(0)
+            # Пользователь мог уже выбрать месяц сам
+            if widget.current_period is None:
+                widget.select_period(period)
+            QTimer.singleShot(0, self.load_pending_period)
+        else:
+            self.report_startup()
+    
+    def table_painted(self):
+        """Первая отрисовка таблицы месяца (вызывается из MonthWidget.eventFilter)"""
+        if self._table_painted:
+            return
+        self._table_painted = True
+        if self._startup_waiting:
+            self._startup_waiting = False
+            self.report_startup()
+    
+    def report_startup(self):
+        """Показывает и запоминает время запуска; превышение бюджета пишется в stderr"""
+        if not self._table_painted and any(widget.table is not None for widget in self.month_widgets):
+            # Таблица построена, но еще не отрисована: отчет после первой отрисовки
+            self._startup_waiting = True
+            return
+        interactive_ms = (time.perf_counter() - STARTUP_STARTED) * 1000
+        budget_ms = int(self.settings.value("startup_budget_ms", self.STARTUP_BUDGET_MS))
+        self.settings.setValue("startup/interactive_ms", round(interactive_ms))
+        
+        message = f"Запуск: готово к работе за {interactive_ms:.0f} мс"
+        if self._first_paint_ms is not None:
+            self.settings.setValue("startup/first_paint_ms", round(self._first_paint_ms))
+            message = (f"Запуск: окно отрисовано за {self._first_paint_ms:.0f} мс, "
+                       f"готово к работе за {interactive_ms:.0f} мс")
+        if interactive_ms > budget_ms:
+            message += f" (бюджет {budget_ms} мс превышен)"
+            print(message, file=sys.stderr)
+        self.statusBar().showMessage(message, 5000)
+    
+    def select_month_and_year(self):
+        """Открывает диалог выбора месяца и года"""
+        dialog = MonthSelectionDialog(self)
+        if dialog.exec_() == QDialog.Accepted:
+            selected_period = dialog.get_selected_period()
+            
+            # Проверяем, существует ли уже такой период
+            if selected_period in self.db.get_periods():
+                QMessageBox.information(self, "Информация", "Этот месяц уже существует")
+                return
+            
+            self.create_new_period(selected_period)
+
+    def create_new_period(self, period):
+        """Создает новый период с выбранными сотрудниками"""
+        dialog = EmployeeSelectionDialog(self.db.employees, self)
+        if dialog.exec_() == QDialog.Accepted:
+            selected_ids = dialog.get_selected_employees()
+            if not selected_ids:
+                QMessageBox.warning(self, "Ошибка", "Не выбрано ни одного сотрудника")
+                return
+            
+            try:
+                year, month = map(int, period.split('-'))
+                days_in_month = self.calendar.days_in_month(year, month)
+            except:
+                days_in_month = 31
+            
+            self.db.save_schedule(period, {
+                "employees": selected_ids,
+                "schedule": {emp_id: [self.statuses.empty] * days_in_month for emp_id in selected_ids},
+                "notes": {}
+            })
+            
+            # Обновляем комбо-боксы во всех окнах
+            periods = self.db.get_periods()
+            for widget in self.month_widgets:
+                widget.load_periods(periods)
+            
+            # Устанавливаем новый период в первое окно
+            self.month_widgets[0].select_period(period)
+    
+    def add_employees_to_period(self):
+        """Добавляет сотрудников в уже созданный месяц"""
+        # Используем текущий период из активного виджета
+        current_widget = self.get_active_month_widget()
+        if not current_widget or not current_widget.current_period:
+            QMessageBox.warning(self, "Ошибка", "Сначала выберите месяц в одном из окон")
+            return
+        
+        # Таблица будет перезагружена: сначала записываем несохраненные правки
+        self.flush_autosave(wait=True)
+        
+        schedule_data = self.db.load_schedule(current_widget.current_period)
+        if not schedule_data:
+            QMessageBox.warning(self, "Ошибка", "Не удалось загрузить данные выбранного месяца")
+            return
+        
+        current_employees = schedule_data.get("employees", [])
+        
+        dialog = AddEmployeeToPeriodDialog(self.db.employees, current_employees, self)
+        if dialog.exec_() == QDialog.Accepted:
+            selected_ids = dialog.get_selected_employees()
+            if not selected_ids:
+                return
+            
+            try:
+                year, month = map(int, current_widget.current_period.split('-'))
+                days_in_month = self.calendar.days_in_month(year, month)
+            except:
+                days_in_month = 31
+            
+            # Обновляем данные
+            schedule_data["employees"].extend(selected_ids)
+            
+            # Добавляем пустые расписания для новых сотрудников
+            for emp_id in selected_ids:
+                schedule_data["schedule"][emp_id] = [self.statuses.empty] * days_in_month
+            
+            # Сохраняем обновленные данные
+            try:
+                saved = self.db.save_schedule(current_widget.current_period, schedule_data)
+            except PeriodChangedError:
+                self.reload_changed_period(current_widget.current_period)
+                QMessageBox.warning(self, "Ошибка", "Месяц изменен другой программой, добавьте сотрудников снова")
+                return
+            if saved:
+                QMessageBox.information(self, "Успех", f"Добавлено сотрудников: {len(selected_ids)}")
+                # Перезагружаем период во всех окнах, где он открыт
+                document = self.documents.get(current_widget.current_period)
+                if document is not None:
+                    document.reload()
+            else:
+                QMessageBox.warning(self, "Ошибка", "Не удалось сохранить изменения")
+    
+    def get_active_month_widget(self):
+        """Определяет, какой виджет месяца активен (имеет фокус)"""
+        for widget in self.month_widgets:
+            if widget.table is not None and widget.table.hasFocus():
+                return widget
+        # Если ни один не имеет фокуса, возвращаем первый
+        return self.month_widgets[0] if self.month_widgets else None
+    
+    def add_month_pane(self, period=None, periods=None):
+        """Добавляет окно месяца в рабочую область и, если задан период, открывает его"""
+        widget = MonthWidget(self, self.db)
+        widget.load_periods(self.db.get_periods() if periods is None else periods)
+        self.month_widgets.append(widget)
+        self.splitter.addWidget(widget)
+        # Окна делят высоту поровну
+        self.splitter.setSizes([400] * len(self.month_widgets))
+        if period:
+            widget.select_period(period)
+        return widget
+    
+    def close_month_pane(self, widget):
+        """Закрывает окно месяца; последнее окно остается"""
+        if len(self.month_widgets) <= 1:
+            return
+        widget.detach()
+        self.month_widgets.remove(widget)
+        widget.setParent(None)
+        widget.deleteLater()
+    
+    def acquire_document(self, period, pane):
+        """Документ периода для окна; окна с одним периодом получают общий документ"""
+        document = self.documents.get(period)
+        if document is None:
+            document = PeriodDocument(self, period)
+            self.documents[period] = document
+        document.panes.add(pane)
+        return document
+    
+    def release_document(self, document, pane):
+        """Окно больше не показывает период; без окон документ сохраняется и удаляется"""
+        document.panes.discard(pane)
+        if document.panes or self.documents.get(document.period) is not document:
+            return
+        if document.dirty_rows:
+            self._dirty_periods[document.period] = document
+            self.flush_autosave()
+        del self.documents[document.period]
+        document.deleteLater()
+    
+    def mark_period_dirty(self, document):
+        """Помечает период измененным и откладывает его автосохранение"""
+        self._dirty_periods[document.period] = document
+        self.autosave_timer.start()
+    
+    def flush_autosave(self, wait=False):
+        """Запускает фоновое сохранение измененных периодов"""
+        self.autosave_timer.stop()
+        for period, document in list(self._dirty_periods.items()):
+            del self._dirty_periods[period]
+            prepared = self.prepare_save_data(document)
+            if not prepared:
+                continue
+            schedule_data, changed_rows = prepared
+            if period in self._save_threads:
+                # Запись этого периода уже идет: сохраним свежий снимок после нее,
+                # включая строки из предыдущего отложенного снимка
+                if period in self._queued_saves:
+                    changed_rows |= self._queued_saves[period][1]
+                self._queued_saves[period] = (schedule_data, changed_rows)
+            else:
+                self.start_background_save(period, schedule_data, changed_rows)
+        if wait:
+            self.wait_for_saves()
+    
+    def start_background_save(self, period, schedule_data, changed_rows):
+        thread = SaveThread(self.db, period, schedule_data, changed_rows)
+        thread.finished.connect(self.background_save_finished)
+        self._save_threads[period] = thread
+        thread.start()
+    
+    def background_save_finished(self, ok, message):
+        thread = self.sender()
+        if self._save_threads.get(thread.period) is thread:
+            del self._save_threads[thread.period]
+        thread.wait()
+        thread.deleteLater()
+        
+        if thread.conflict:
+            self.reload_changed_period(thread.period, lost=True)
+        elif ok:
+            self.statusBar().showMessage(f"Автосохранено: {message}", 2000)
+        else:
+            self.statusBar().showMessage(f"Ошибка автосохранения: {message}", 5000)
+            self.mark_save_failed(thread.period)
+        
+        queued = self._queued_saves.pop(thread.period, None)
+        if queued is not None:
+            self.start_background_save(thread.period, *queued)
+    
+    def wait_for_saves(self):
+        """Дожидается фоновых записей и синхронно сохраняет отложенные снимки"""
+        for thread in list(self._save_threads.values()):
+            thread.wait()
+        for period, (schedule_data, changed_rows) in list(self._queued_saves.items()):
+            try:
+                saved = self.db.save_schedule(period, schedule_data, changed_rows)
+            except PeriodChangedError:
+                self.reload_changed_period(period, lost=True)
+                continue
+            if not saved:
+                self.statusBar().showMessage(f"Ошибка автосохранения: {period}", 5000)
+                self.mark_save_failed(period)
+        self._queued_saves.clear()
+    
+    def reload_changed_period(self, period, lost=False):
+        """Перечитывает месяц, измененный другой программой (например, командой generate).
+
+        Правки этого месяца, сделанные по старой таблице, не записываются поверх
+        чужих изменений; lost - отклонена уже начатая запись.
+        """
+        self._dirty_periods.pop(period, None)
+        lost = self._queued_saves.pop(period, None) is not None or lost
+        document = self.documents.get(period)
+        if document is not None:
+            lost = lost or bool(document.dirty_rows)
+            document.reload()
+        message = f"Месяц {period} изменен другой программой и перечитан"
+        if lost:
+            QMessageBox.warning(self, "Месяц изменен", f"{message}. Несохраненные правки этого месяца отменены.")
+        else:
+            self.statusBar().showMessage(message, 5000)
+    
+    def reload_changed_periods(self):
+        """Перечитывает открытые месяцы, которые изменила другая программа"""
+        for period in list(self.documents):
+            # Идущую запись проверит сам менеджер
+            if period not in self._save_threads and self.db.period_changed_on_disk(period):
+                self.reload_changed_period(period)
+    
+    def changeEvent(self, event):
+        super().changeEvent(event)
+        # Пока окно было неактивно, месяц могли заполнить из консоли
+        if event.type() == QEvent.ActivationChange and self.isActiveWindow():
+            self.reload_changed_periods()
+    
+    def mark_save_failed(self, period):
+        """После ошибки записи период снова считается измененным целиком"""
+        document = self.documents.get(period)
+        if document is not None:
+            document.dirty_rows.update(range(len(document.row_ids)))
+            self._dirty_periods[period] = document
+    
+    def closeEvent(self, event):
+        # Несохраненные правки записываются до закрытия окна
+        self.flush_autosave(wait=True)
+        # Открытые месяцы восстанавливаются при следующем запуске
+        periods = [widget.current_period for widget in self.month_widgets if widget.current_period]
+        if periods:
+            self.settings.setValue("workspace/periods", periods)
+        if self._export_thread is not None:
+            self._export_thread.wait()
+        super().closeEvent(event)
+    
+    def save_data(self):
+        """Объединенная функция сохранения данных и экспорта в Excel"""
+        # Фоновые записи должны закончиться раньше, иначе старый снимок перезапишет новый
+        self.autosave_timer.stop()
+        self._dirty_periods.clear()
+        self.wait_for_saves()
+        
+        # Сохраняем только месяцы с измененными строками
+        saved_any = False
+        for period, document in list(self.documents.items()):
+            prepared = self.prepare_save_data(document)
+            if prepared:
+                schedule_data, changed_rows = prepared
+                try:
+                    saved = self.db.save_schedule(period, schedule_data, changed_rows)
+                except PeriodChangedError:
+                    self.reload_changed_period(period, lost=True)
+                    continue
+                if saved:
+                    saved_any = True
+                    self.statusBar().showMessage(f"Сохранено: {period}", 2000)
+                else:
+                    self.statusBar().showMessage("Ошибка сохранения", 5000)
+                    self.mark_save_failed(period)
+                    return
+        if not saved_any:
+            self.statusBar().showMessage("Нет изменений для сохранения", 2000)
+        
+        # Затем экспортируем в Excel
+        self.export_to_excel()
+    
+    def prepare_save_data(self, document):
+        """Собирает снимок периода, читая из таблицы только измененные строки.
+
+        Возвращает (данные, id сотрудников с измененными строками) или None, если
+        изменений нет. Снимок передается в поток сохранения, поэтому строится
+        новый словарь; неизмененные строки берутся из прошлого снимка.
+        """
+        if not document.row_ids or not document.dirty_rows or document.saved_data is None:
+            return None
+            
+        saved = document.saved_data
+        schedule_data = {k: v for k, v in saved.items() if k not in ("schedule", "notes")}
+        schedule_data["employees"] = list(document.row_ids)
+        schedule_data["schedule"] = dict(saved.get("schedule", {}))
+        schedule_data["notes"] = dict(saved.get("notes", {}))
+        changed_rows = set()
+        
+        for row in sorted(document.dirty_rows):
+            emp_id = document.row_ids[row]
+            # Модель хранит все дни месяца, включая скрытые воскресенья
+            full_schedule, notes = document.model.row_snapshot(row)
+            
+            schedule_data["schedule"][emp_id] = full_schedule
+            if notes:
+                schedule_data["notes"][emp_id] = notes
+            else:
+                schedule_data["notes"].pop(emp_id, None)
+            changed_rows.add(emp_id)
+        
+        document.saved_data = schedule_data
+        document.dirty_rows.clear()
+        return schedule_data, changed_rows
+    
+    def refresh_employee_names(self):
+        """Обновляет имена сотрудников в заголовках строк после переименования"""
+        for document in self.documents.values():
+            document.refresh_employee_names()
+    
+    def update_selected_status(self, status):
+        """Обновляет статус для активного виджета"""
+        active_widget = self.get_active_month_widget()
+        if active_widget:
+            active_widget.update_selected_status(status)
+    
+    def undo_edit(self):
+        """Отменяет последнюю правку месяца в активном окне"""
+        widget = self.get_active_month_widget()
+        if widget is None or widget.document is None:
+            return
+        count = widget.document.undo()
+        self.statusBar().showMessage(f"Отменено изменений: {count}" if count else "Нечего отменять", 2000)
+    
+    def redo_edit(self):
+        """Повторяет отмененную правку месяца в активном окне"""
+        widget = self.get_active_month_widget()
+        if widget is None or widget.document is None:
+            return
+        count = widget.document.redo()
+        self.statusBar().showMessage(f"Повторено изменений: {count}" if count else "Нечего повторять", 2000)
+    
+    def add_employee_dialog(self):
+        name, ok = QInputDialog.getText(self, "Добавить сотрудника", "ФИО сотрудника:")
+        if ok and name:
+            name = name.strip()
+            if not name:
+                QMessageBox.warning(self, "Ошибка", "Имя сотрудника не может быть пустым")
+                return
+                
+            if self.db.add_employee(name):
+                QMessageBox.information(self, "Успех", "Сотрудник добавлен")
+            else:
+                QMessageBox.warning(self, "Ошибка", "Сотрудник с таким именем уже существует")
+    
+    def open_document(self):
+        """Открывает сохраненную таблицу Excel"""
+        if not self.export_folder:
+            QMessageBox.warning(self, "Ошибка", "Сначала выберите папку для экспорта")
+            return
+        
+        file_path = os.path.join(self.export_folder, ScheduleExporter.FILE_NAME)
+        
+        if not os.path.exists(file_path):
+            QMessageBox.warning(self, "Ошибка", f"Файл не найден:\n{file_path}")
+            return
+        
+        try:
+            # Открываем файл с помощью стандартного приложения
+            if sys.platform == "win32":
+                os.startfile(file_path)
+            elif sys.platform == "darwin":  # macOS
+                os.system(f'open "{file_path}"')
+            else:  # linux
+                os.system(f'xdg-open "{file_path}"')
+            
+            self.statusBar().showMessage(f"Открыт файл: {file_path}", 3000)
+            
+        except Exception as e:
+            QMessageBox.critical(self, "Ошибка", f"Не удалось открыть файл:\n{str(e)}")
+        
+    def select_export_folder(self):
+        folder = QFileDialog.getExistingDirectory(self, "Выберите папку для сохранения")
+        if folder:
+            self.export_folder = folder
+            self.settings.setValue("export_folder", folder)
+            QMessageBox.information(self, "Успех", f"Папка для экспорта установлена: {folder}")
+    
+    def show_analytics(self):
+        # Итоги берутся из сводок сохраненных периодов, поэтому правки сначала записываются
+        self.flush_autosave(wait=True)
+        AnalyticsDialog(self.db, self.month_names, self).exec_()
+    
+    def export_to_excel(self):
+        if not self.export_folder:
+            self.select_export_folder()
+            if not self.export_folder:
+                return
+
+        if self._export_thread is not None:
+            # Данные могли измениться после начала текущего экспорта
+            self._export_pending = True
+            return
+
+        file_path = os.path.join(self.export_folder, ScheduleExporter.FILE_NAME)
+        self._export_thread = ExportThread(self.exporter, file_path)
+        self._export_thread.finished.connect(self.export_finished)
+        self._export_thread.start()
+        self.statusBar().showMessage("Экспорт в Excel...")
+    
+    def export_finished(self, ok, message):
+        thread = self._export_thread
+        self._export_thread = None
+        thread.wait()
+        thread.deleteLater()
+        
+        if not ok:
+            QMessageBox.critical(self, "Ошибка", f"Не удалось экспортировать файл:\n{message}")
+        elif thread.written:
+            self.statusBar().clearMessage()
+            QMessageBox.information(self, "Успех", f"Файл сохранен:\n{message}")
+        else:
+            self.statusBar().showMessage("Данные не изменились, экспорт в Excel пропущен", 3000)
+        
+        if self._export_pending:
+            self._export_pending = False
+            self.export_to_excel()
+
+
+# Отсчет времени запуска окна; run() получает его от точки входа, до импорта PyQt5
+STARTUP_STARTED = time.perf_counter()
+
+
+def run(started=None):
+    """Показывает окно и выполняет цикл событий; возвращает код завершения"""
+    global STARTUP_STARTED
+    if started is not None:
+        STARTUP_STARTED = started
+    app = QApplication(sys.argv)
+    font = app.font()
+    font.setFamily("Arial")
+    font.setPointSize(10)
+    app.setFont(font)
+    window = ScheduleApp()
+    window.showMaximized()
+    return app.exec_()
\ No newline at end of file
@@ -0,0 +1,40 @@
+import os
+import tempfile
+import unittest
+
+from schedule_core import PackedSchedule, StatusRegistry, DEFAULT_STATUSES
+
+
+class PackedScheduleRoundTripTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "2024-01.bin")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def read(self):
+        with PackedSchedule(self.path) as packed:
+            return packed.to_dict()
+
+    def test_short_rows_padded_with_empty_status(self):
+        data = {"employees": ["a", "b"],
+                "schedule": {"a": [0] * 31, "b": [1] * 28},
+                "notes": {"a": {"3": {"end_time": "10:00", "worked_hours": 2}}}}
+        PackedSchedule.write(self.path, data)
+        loaded = self.read()
+        self.assertEqual(loaded["schedule"]["a"], [0] * 31)
+        self.assertEqual(loaded["schedule"]["b"], [1] * 28 + [DEFAULT_STATUSES.empty] * 3)
+        self.assertEqual(loaded["notes"], data["notes"])
+        self.assertEqual(loaded["employees"], ["a", "b"])
+
+    def test_custom_empty_status(self):
+        registry = StatusRegistry({"statuses": [{"code": 0}, {"code": 2}, {"code": 9}], "counters": [],
+                                   "empty": 9, "absent": 2})
+        PackedSchedule.write(self.path, {"schedule": {"a": [0] * 30, "b": [2]}}, registry.empty)
+        loaded = self.read()
+        self.assertEqual(loaded["schedule"]["b"], [2] + [9] * 29)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,62 @@
+import os
+import tempfile
+import unittest
+
+from schedule_core import PeriodChangedError, ScheduleManager
+
+
+class JournalTornWriteTest(unittest.TestCase):
+    def setUp(self):
+        self.cwd = os.getcwd()
+        self.tmp = tempfile.TemporaryDirectory()
+        os.chdir(self.tmp.name)
+        self.db = ScheduleManager()
+        self.db.add_employee("Иванов")
+        self.emp = self.db.employees[0]["id"]
+        self.db.save_schedule("2024-01", {"employees": [self.emp], "schedule": {self.emp: [0] * 5}, "notes": {}})
+
+    def tearDown(self):
+        os.chdir(self.cwd)
+        self.tmp.cleanup()
+
+    def edit(self, db, day, status):
+        data = db.load_schedule("2024-01")
+        data["schedule"][self.emp][day] = status
+        self.assertTrue(db.save_schedule("2024-01", data, [self.emp]))
+
+    def reload(self):
+        return ScheduleManager().load_schedule("2024-01")["schedule"][self.emp]
+
+    def test_save_after_torn_record(self):
+        self.edit(self.db, 0, 1)
+        self.edit(self.db, 1, 1)
+        journal = self.db._journal_path("2024-01")
+        with open(journal, 'r+b') as f:
+            # Обрываем вторую запись посередине
+            f.truncate(os.path.getsize(journal) - 8)
+        db = ScheduleManager()
+        self.edit(db, 2, 3)
+        self.assertEqual(self.reload(), [1, 0, 3, 0, 0])
+
+    def test_record_without_newline(self):
+        self.edit(self.db, 0, 1)
+        journal = self.db._journal_path("2024-01")
+        with open(journal, 'r+b') as f:
+            f.truncate(os.path.getsize(journal) - 1)
+        self.edit(self.db, 2, 3)
+        self.assertEqual(self.reload(), [1, 0, 3, 0, 0])
+
+    def test_save_over_foreign_change(self):
+        data = self.db.load_schedule("2024-01")
+        # Другой процесс (например, generate) успел записать период
+        self.edit(ScheduleManager(), 0, 1)
+        data["schedule"][self.emp][1] = 3
+        with self.assertRaises(PeriodChangedError):
+            self.db.save_schedule("2024-01", data, [self.emp])
+        self.assertEqual(self.reload(), [1, 0, 0, 0, 0])
+        self.edit(self.db, 1, 3)
+        self.assertEqual(self.reload(), [1, 3, 0, 0, 0])
+
+
+if __name__ == "__main__":
+    unittest.main()